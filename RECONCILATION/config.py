@@ -164,6 +164,11 @@ TURNOVER_MAPPING = {
     "Other Income": [None, "Other Income"]
 }
 
+# The same mapping as parallel tuples, position i of each describing one turnover component
+TURNOVER_BOOKS_FIELDS = tuple(TURNOVER_MAPPING.keys())
+TURNOVER_GST_FIELDS = tuple(fields[0] for fields in TURNOVER_MAPPING.values())
+TURNOVER_FS_FIELDS = tuple(fields[1] for fields in TURNOVER_MAPPING.values())
+
 # Threshold limits for highlighting discrepancies
 AMOUNT_THRESHOLD = 1.0  # Rs. 1 difference is allowed
 PERCENTAGE_THRESHOLD = 0.01  # 1% difference is allowed
\ No newline at end of file
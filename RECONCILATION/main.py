@@ -1,9 +1,734 @@
 import pandas as pd
-import json
 import streamlit as st
 import re
+import io
+import os
+import hashlib
+import json
+import tempfile
 import numpy as np
-from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Not a public pandas API, so it may move between releases
+try:
+    from pandas.io.json import ujson_loads
+except ImportError:
+    ujson_loads = None
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+# Opt-in polars CSV reader for large purchase registers
+USE_POLARS = os.getenv("RECON_USE_POLARS", "").lower() in ("1", "true", "yes")
+
+# Parsed purchase registers cached as Parquet; bump the version when reader output changes
+PURCHASE_CACHE_DIR = os.path.join(tempfile.gettempdir(), "gst_recon_purchase_cache")
+PURCHASE_CACHE_VERSION = 2
+PURCHASE_CACHE_MAX_ENTRIES = 16
+
+# --- GSTR-2B Parsing ---
+def load_gstr2b_json(raw):
+    """
+    Parse GSTR-2B JSON content with a C-accelerated parser.
+
+    Args:
+        raw (bytes): Contents of the uploaded JSON file
+
+    Returns:
+        dict: Parsed GSTR-2B data
+    """
+    if orjson is not None:
+        return orjson.loads(raw)
+    if ujson_loads is not None:
+        try:
+            # Bundled with pandas; precise_float keeps amounts identical to the json module
+            return ujson_loads(raw, precise_float=True)
+        except ValueError:
+            # Out-of-range numbers such as 1e400, which the json module accepts
+            pass
+    return json.loads(raw)
+
+def derive_tax_rate(igst, cgst, sgst, txval):
+    """
+    Derive GST rates from tax amounts and taxable values.
+
+    Args:
+        igst (ndarray): IGST amounts
+        cgst (ndarray): CGST amounts
+        sgst (ndarray): SGST amounts
+        txval (ndarray): Taxable values
+
+    Returns:
+        ndarray: Rounded rates in percent; 0 where no rate can be derived
+    """
+    derivable = (txval > 0) & (igst + cgst + sgst > 0)
+    safe_txval = np.where(txval > 0, txval, 1)
+    return np.select(
+        [derivable & (igst > 0), derivable & (cgst > 0) & (sgst > 0)],
+        [np.round(igst / safe_txval * 100), np.round((cgst + sgst) / safe_txval * 100)],
+        default=0
+    )
+
+def parse_b2b_invoices(b2b, default_inv_num=""):
+    """
+    Flatten GSTR-2B b2b party records into one row per invoice.
+
+    Args:
+        b2b (list): Party records, each with a 'ctin' and a list of 'inv' invoices
+        default_inv_num (str): Invoice number used when an invoice has no 'inum'
+
+    Returns:
+        DataFrame: gstin, inv_num, date, taxable_value, rate and supply_type per invoice
+    """
+    parties = [party for party in b2b if "inv" in party]
+
+    # Collect the needed fields into one array per field in a single pass
+    count = sum(len(party["inv"]) for party in parties)
+    invoice_fields = ["inum", "dt", "txval", "igst", "cgst", "sgst"]
+    columns = {name: np.empty(count, dtype=object) for name in ["ctin", *invoice_fields, "first_item"]}
+    i = 0
+    for party in parties:
+        ctin = party.get("ctin")
+        for inv in party["inv"]:
+            columns["ctin"][i] = ctin
+            for name in invoice_fields:
+                columns[name][i] = inv.get(name)
+            items = inv.get("items")
+            columns["first_item"][i] = items[0] if isinstance(items, list) and items else None
+            i += 1
+    invoices = pd.DataFrame(columns).infer_objects()
+
+    def field(name, default):
+        if invoices[name].isna().all():
+            return pd.Series(default, index=invoices.index)
+        return invoices[name].fillna(default)
+
+    def amount(name):
+        return pd.to_numeric(field(name, 0), errors="coerce").fillna(0)
+
+    # Extract tax values
+    igst_amt = amount("igst")
+    cgst_amt = amount("cgst")
+    sgst_amt = amount("sgst")
+
+    # Use item level data where present (assuming first item per invoice)
+    first_item = invoices["first_item"]
+    has_items = first_item.notna()
+    if not has_items.any():
+        first_item = pd.Series(np.nan, index=invoices.index, dtype=object)
+    item_txval = pd.to_numeric(first_item.str.get("txval"), errors="coerce").fillna(0)
+    item_rate = pd.to_numeric(first_item.str.get("rt"), errors="coerce").fillna(0)
+
+    # Otherwise use invoice level data and derive the rate from tax amounts
+    txval = item_txval.where(has_items, amount("txval"))
+    derived_rate = derive_tax_rate(
+        igst_amt.to_numpy(), cgst_amt.to_numpy(), sgst_amt.to_numpy(), txval.to_numpy()
+    )
+    rate = item_rate.where(has_items, derived_rate)
+    # Keep whole-number rates as integers, as the per-invoice records did
+    if (rate % 1 == 0).all():
+        rate = rate.astype("int64")
+
+    records = pd.DataFrame({
+        "gstin": field("ctin", "").astype(str).str.upper(),
+        "inv_num": field("inum", default_inv_num).astype(str).str.strip().str.upper(),
+        "date": field("dt", ""),
+        "taxable_value": txval.round(2),
+        "rate": rate,
+        # Determine supply type from tax composition rather than POS
+        "supply_type": np.where(igst_amt > 0, "INTER", "INTRA")
+    })
+
+    # Only keep records with some taxable value
+    return records[txval > 0].reset_index(drop=True)
+
+@st.cache_data(show_spinner=False)
+def parse_gstr2b(raw):
+    """
+    Parse an uploaded GSTR-2B JSON file into b2b invoice records.
+
+    Cached on the file contents, so reruns with the same file skip parsing.
+
+    Args:
+        raw (bytes): Contents of the uploaded JSON file
+
+    Returns:
+        tuple: (DataFrame of invoices, sample of the invoice structure for display,
+                top-level keys when the standard structure is missing, else None)
+    """
+    gstr2b_data = load_gstr2b_json(raw)
+
+    sample_json = {}
+    if "data" in gstr2b_data and "docdata" in gstr2b_data["data"]:
+        if "b2b" in gstr2b_data["data"]["docdata"] and len(gstr2b_data["data"]["docdata"]["b2b"]) > 0:
+            sample_party = gstr2b_data["data"]["docdata"]["b2b"][0]
+            if "inv" in sample_party and len(sample_party["inv"]) > 0:
+                sample_json = {
+                    "structure": "party -> inv -> details",
+                    "sample_invoice": sample_party["inv"][0]
+                }
+
+    # Check if b2b data exists
+    if "data" in gstr2b_data and "docdata" in gstr2b_data["data"] and "b2b" in gstr2b_data["data"]["docdata"]:
+        return parse_b2b_invoices(gstr2b_data["data"]["docdata"]["b2b"], default_inv_num="UNKNOWN"), sample_json, None
+
+    # Try alternate parsing based on common structures
+    df_2b = pd.DataFrame()
+    if "b2b" in gstr2b_data:
+        # Direct b2b array at root level
+        df_2b = parse_b2b_invoices(gstr2b_data["b2b"])
+    return df_2b, sample_json, list(gstr2b_data.keys())
+
+# --- Purchase Register Parsing ---
+LOCAL_RATE_COLUMNS = {
+    "Purchase Local @18%": 18,
+    "Vechile Repair & Maintance Exp. (Local @18%)": 18,
+    "Vechile Repair & Miantance Exp. (Local @28%)": 28
+}
+
+INTERSTATE_RATE_COLUMNS = {
+    "Purchase Interstate @18%": 18,
+    "VECHILE REPAIR & MAINTANCE EXP. (INTERSTATE @28%)": 28
+}
+
+# Rates inferred from the Particulars text, checked in this order
+PARTICULARS_RATES = [("18%", 18), ("28%", 28), ("12%", 12), ("5%", 5)]
+
+# Text columns read from the purchase register, kept as strings so voucher
+# numbers and GSTINs are not turned into numbers
+PURCHASE_TEXT_COLUMNS = {
+    "Voucher No.": "string",
+    "Date": "string",
+    "GSTIN/UIN": "string",
+    "Particulars": "string"
+}
+
+PURCHASE_AMOUNT_COLUMNS = ["Gross Total", "CGST", "SGST", "IGST", *LOCAL_RATE_COLUMNS, *INTERSTATE_RATE_COLUMNS]
+
+def read_purchase_register(source):
+    """
+    Read only the purchase register columns used for reconciliation.
+
+    Args:
+        source: Path or file-like object of the purchase register CSV
+
+    Returns:
+        DataFrame: Purchase register rows
+    """
+    needed = {*PURCHASE_TEXT_COLUMNS, *PURCHASE_AMOUNT_COLUMNS}
+    df = None
+    if USE_POLARS and pl is not None:
+        try:
+            df = read_purchase_register_polars(source, needed)
+        except Exception:
+            # Fall back to pandas for anything polars cannot read
+            source.seek(0)
+    if df is None:
+        df = pd.read_csv(
+            source,
+            usecols=lambda col: col in needed,
+            dtype=PURCHASE_TEXT_COLUMNS,
+            engine="c"
+        )
+    return coerce_amount_columns(df)
+
+def coerce_amount_columns(df):
+    """
+    Make amount columns numeric, treating blanks and non-numeric values as 0.
+
+    Columns the CSV reader already parsed as numbers are not parsed again.
+
+    Args:
+        df (DataFrame): Purchase register rows
+
+    Returns:
+        DataFrame: The same frame with numeric amount columns
+    """
+    for col in PURCHASE_AMOUNT_COLUMNS:
+        if col not in df.columns:
+            continue
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        df[col] = df[col].fillna(0)
+    return df
+
+# Strings pandas reads as missing by default, so both readers agree
+CSV_NA_VALUES = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND",
+                 "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
+
+def read_purchase_register_polars(source, needed):
+    """
+    Read the purchase register with polars' multithreaded CSV reader.
+
+    Args:
+        source: File-like object of the purchase register CSV
+        needed (set): Columns to keep
+
+    Returns:
+        DataFrame: Purchase register rows as a pandas DataFrame
+    """
+    header = pl.read_csv(source, n_rows=0).columns
+    source.seek(0)
+    columns = [col for col in header if col in needed]
+    text_columns = {col: dtype for col, dtype in PURCHASE_TEXT_COLUMNS.items() if col in columns}
+
+    df = pl.read_csv(
+        source,
+        columns=columns,
+        schema_overrides={col: pl.Utf8 for col in text_columns},
+        null_values=CSV_NA_VALUES,
+        infer_schema_length=None
+    )
+    # Convert column by column so pyarrow is not required
+    return pd.DataFrame({col: df[col].to_numpy() for col in df.columns}).astype(text_columns)
+
+def evict_purchase_cache():
+    """
+    Remove the least recently used Parquet copies beyond PURCHASE_CACHE_MAX_ENTRIES.
+    """
+    try:
+        entries = [entry for entry in os.scandir(PURCHASE_CACHE_DIR) if entry.name.endswith(".parquet")]
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in entries[PURCHASE_CACHE_MAX_ENTRIES:]:
+            os.remove(entry.path)
+    except OSError:
+        # Another session may be evicting the same files
+        pass
+
+@st.cache_data(show_spinner=False)
+def load_purchase_register(raw):
+    """
+    Load an uploaded purchase register, reusing a Parquet copy across sessions.
+
+    The first read of a file parses the CSV and writes a Parquet copy to
+    PURCHASE_CACHE_DIR, keyed by a hash of the file contents, the reader and the
+    columns read; later reads of the same file load the Parquet copy instead.
+    Only the PURCHASE_CACHE_MAX_ENTRIES most recently used copies are kept.
+    Within a session Streamlit's cache returns the parsed frame directly.
+
+    Args:
+        raw (bytes): Contents of the uploaded CSV file
+
+    Returns:
+        DataFrame: Purchase register rows
+    """
+    reader = f"polars-{pl.__version__}" if USE_POLARS and pl is not None else f"pandas-{pd.__version__}"
+    digest = hashlib.blake2b(raw, digest_size=16)
+    digest.update(repr((
+        PURCHASE_CACHE_VERSION, reader,
+        sorted(PURCHASE_TEXT_COLUMNS.items()), PURCHASE_AMOUNT_COLUMNS
+    )).encode())
+    cache_path = os.path.join(PURCHASE_CACHE_DIR, f"purchase_register_{digest.hexdigest()}.parquet")
+
+    if os.path.exists(cache_path):
+        try:
+            df = pd.read_parquet(cache_path)
+            # Mark as recently used for eviction
+            os.utime(cache_path)
+            return df
+        except Exception:
+            # Unreadable cache file, parse the CSV again
+            pass
+
+    df = read_purchase_register(io.BytesIO(raw))
+    try:
+        os.makedirs(PURCHASE_CACHE_DIR, exist_ok=True)
+        df.to_parquet(cache_path, compression="zstd")
+        evict_purchase_cache()
+    except (ImportError, ValueError, TypeError, OSError):
+        # No Parquet engine installed, columns with mixed types or an unwritable
+        # cache directory; skip the cache
+        pass
+    return df
+
+def derive_tax_info(df):
+    """
+    Derive taxable value, rate and supply type for every purchase register row.
+
+    Args:
+        df (DataFrame): Purchase register with numeric amount columns
+
+    Returns:
+        DataFrame: taxable_value, rate and supply_type columns aligned with df
+    """
+    def amount(name):
+        if name in df.columns:
+            return df[name].to_numpy(dtype=float)
+        return np.zeros(len(df))
+
+    taxable_val = np.zeros(len(df))
+    applicable_rate = np.zeros(len(df), dtype=int)
+    is_inter = np.zeros(len(df), dtype=bool)
+
+    # Sum the rate columns; the last positive column (local, then interstate) sets the rate
+    for rate_columns, interstate in ((LOCAL_RATE_COLUMNS, False), (INTERSTATE_RATE_COLUMNS, True)):
+        for col, rate in rate_columns.items():
+            values = amount(col)
+            positive = values > 0
+            taxable_val += np.where(positive, values, 0)
+            applicable_rate = np.where(positive, rate, applicable_rate)
+            if interstate:
+                is_inter |= positive
+
+    # If no taxable value found, use Gross Total and determine type from taxes
+    gross_total = amount("Gross Total")
+    igst = amount("IGST")
+    cgst = amount("CGST")
+    sgst = amount("SGST")
+    use_gross = (taxable_val == 0) & (gross_total > 0)
+    by_igst = use_gross & (igst > 0)
+    by_cgst_sgst = use_gross & ~by_igst & (cgst > 0) & (sgst > 0)
+    by_gross_only = use_gross & ~by_igst & ~by_cgst_sgst
+
+    total_tax = np.where(by_igst, igst, cgst + sgst)
+    net_value = gross_total - total_tax
+    net_rate = np.where(net_value > 0, np.round(total_tax / np.where(net_value > 0, net_value, 1) * 100), 0)
+
+    # If we can't determine, try to infer rate from common rates in Particulars
+    particulars_rate = np.zeros(len(df), dtype=int)
+    if "Particulars" in df.columns:
+        particulars = df["Particulars"]
+        if pd.api.types.is_string_dtype(particulars):
+            # .str operations yield NaN for cells that are not text
+            is_text = particulars.str.len().notna().to_numpy()
+        else:
+            # Object columns can mix text with numbers and blanks
+            is_text = particulars.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+        particulars = particulars.where(is_text).astype("string")
+        particulars_rate = np.select(
+            [particulars.str.contains(text, regex=False, na=False).to_numpy() for text, _ in PARTICULARS_RATES],
+            [rate for _, rate in PARTICULARS_RATES],
+            default=18  # Default most common rate
+        )
+        particulars_rate = np.where(is_text, particulars_rate, 0)
+
+    by_tax = by_igst | by_cgst_sgst
+    taxable_val = np.select([by_tax, by_gross_only], [net_value, gross_total], default=taxable_val)
+    applicable_rate = np.select([by_tax, by_gross_only], [net_rate, particulars_rate], default=applicable_rate)
+
+    return pd.DataFrame({
+        "taxable_value": taxable_val,
+        "rate": applicable_rate.astype(int),
+        "supply_type": np.where(is_inter | by_igst, "INTER", "INTRA")
+    }, index=df.index)
+
+# --- Date Normalization ---
+# Accepted date formats, tried in this order
+DATE_FORMATS = ('%d-%m-%Y', '%d/%m/%Y', '%Y-%m-%d', '%m/%d/%Y', '%d-%b-%Y', '%d %b %Y')
+
+def convert_date_format(dates):
+    """
+    Convert dates to DD-MM-YYYY, trying each accepted format over the whole column.
+
+    Args:
+        dates (Series): Raw date values
+
+    Returns:
+        Series: Formatted dates; values matching no format are left unchanged
+    """
+    if not (pd.api.types.is_string_dtype(dates) or pd.api.types.is_object_dtype(dates)):
+        return dates
+    # Only text dates are converted
+    text = dates[dates.str.len().notna()] if dates.notna().any() else dates.iloc[:0]
+
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        unparsed = parsed.isna()
+        if not unparsed.any():
+            break
+        parsed = parsed.combine_first(pd.to_datetime(text[unparsed], format=fmt, errors="coerce"))
+
+    formatted = parsed.dropna().dt.strftime('%d-%m-%Y')
+    return formatted.reindex(dates.index).fillna(dates)
+
+# --- Invoice Number Normalization ---
+NON_ALNUM_PATTERN = re.compile(r'[^A-Z0-9]')
+NON_DIGIT_PATTERN = re.compile(r'[^0-9]')
+# Common prefixes, stripped one after another in this order. A plain alternation
+# would strip at most one prefix and change results (INVOICE12 -> OICE12 today).
+INVOICE_PREFIX_PATTERN = re.compile(r'^(?:INV)?(?:INVOICE)?(?:BILL)?(?:SI)?(?:TAX)?')
+
+def normalize_invoice_nums(inv_nums):
+    """
+    Build normalized forms of invoice numbers for more matching options.
+
+    Args:
+        inv_nums (Series): Raw invoice numbers
+
+    Returns:
+        tuple: (Series of upper-cased alphanumeric numbers without common prefixes,
+                Series of only the numeric part of those)
+    """
+    # Non-string invoice numbers cannot be normalized
+    inv_nums = inv_nums.str.upper().fillna("")
+
+    # Normalize each distinct invoice number once; register rows often repeat a voucher
+    codes, uniques = pd.factorize(inv_nums)
+    uniques = pd.Series(uniques, dtype=inv_nums.dtype)
+
+    clean_inv = uniques.str.replace(NON_ALNUM_PATTERN, "", regex=True)
+    clean_inv = clean_inv.str.replace(INVOICE_PREFIX_PATTERN, "", regex=True)
+    num_only = clean_inv.str.replace(NON_DIGIT_PATTERN, "", regex=True)
+
+    return (
+        pd.Series(clean_inv.to_numpy()[codes], index=inv_nums.index, dtype=inv_nums.dtype),
+        pd.Series(num_only.to_numpy()[codes], index=inv_nums.index, dtype=inv_nums.dtype)
+    )
+
+# --- Invoice Matching ---
+# Exact matching strategies, tried in order
+MATCH_KEYS = [
+    ["gstin", "inv_num"],       # Strategy 1: GSTIN + Invoice Number
+    ["gstin", "norm_inv_num"],  # Strategy 2: GSTIN + normalized invoice number
+    ["gstin", "num_only"]       # Strategy 3: GSTIN + numeric-only invoice number
+]
+
+def factorize_keys(df_2b, df_csv, columns):
+    """
+    Encode key columns as int32 codes shared by both tables.
+
+    Args:
+        df_2b (DataFrame): GSTR-2B invoices
+        df_csv (DataFrame): Purchase register rows
+        columns (list): Key columns to encode
+
+    Returns:
+        tuple: (DataFrame of codes indexed like df_2b, DataFrame of codes indexed like df_csv);
+               missing values are coded as -1
+    """
+    codes_2b = pd.DataFrame(index=df_2b.index)
+    codes_csv = pd.DataFrame(index=df_csv.index)
+    for col in columns:
+        codes, _ = pd.factorize(pd.concat([df_2b[col], df_csv[col]], ignore_index=True))
+        codes = codes.astype("int32")
+        codes_2b[col] = codes[:len(df_2b)]
+        codes_csv[col] = codes[len(df_2b):]
+    return codes_2b, codes_csv
+
+def fuzzy_match_invoices(values_2b, gstin_2b, values_csv, gstin_csv):
+    """
+    Pair invoices with the closest register amount for the same GSTIN.
+
+    An invoice matches when the closest amount is within 1% or ₹10. Each round is
+    an as-of merge on amount grouped by GSTIN; a register row claimed by several
+    invoices goes to the closest one, and the others retry against the rows that
+    are left.
+
+    Args:
+        values_2b (Series): Taxable values of unmatched GSTR-2B invoices
+        gstin_2b (Series): GSTIN codes of those invoices
+        values_csv (Series): Taxable values of unmatched purchase register rows
+        gstin_csv (Series): GSTIN codes of those rows
+
+    Returns:
+        DataFrame: row_2b and csv_row index labels of each matched pair
+    """
+    left = pd.DataFrame({
+        "gstin": gstin_2b.to_numpy(),
+        "taxable_value": values_2b.to_numpy(),
+        "row_2b": np.arange(len(values_2b))
+    })
+    right = pd.DataFrame({
+        "gstin": gstin_csv.to_numpy(),
+        "csv_taxable_value": values_csv.to_numpy(),
+        "csv_row": np.arange(len(values_csv))
+    })
+    # Rows without a GSTIN or an amount cannot match
+    left = left[(left["gstin"] >= 0) & left["taxable_value"].notna()]
+    right = right[(right["gstin"] >= 0) & right["csv_taxable_value"].notna()]
+    right = right.sort_values("csv_taxable_value", kind="stable")
+
+    rounds = []
+    while not left.empty and not right.empty:
+        nearest = pd.merge_asof(
+            left.sort_values("taxable_value", kind="stable"), right,
+            left_on="taxable_value", right_on="csv_taxable_value",
+            by="gstin", direction="nearest"
+        ).dropna(subset=["csv_row"])
+
+        diff = (nearest["csv_taxable_value"] - nearest["taxable_value"]).abs()
+        percent_diff = (diff / nearest["taxable_value"] * 100).where(nearest["taxable_value"] > 0, 100)
+        nearest = nearest.assign(diff=diff)[(percent_diff < 1) | (diff < 10)]
+        if nearest.empty:
+            break
+
+        # Each register row goes to the closest invoice, the earlier one on ties
+        winners = nearest.sort_values(["diff", "row_2b"], kind="stable").drop_duplicates("csv_row")
+        rounds.append(winners[["row_2b", "csv_row"]])
+
+        # Invoices whose closest row was taken retry; the others have no candidate left
+        retry = nearest.loc[~nearest["row_2b"].isin(winners["row_2b"]), "row_2b"]
+        left = left[left["row_2b"].isin(retry)]
+        right = right[~right["csv_row"].isin(winners["csv_row"])]
+
+    if not rounds:
+        return pd.DataFrame({"row_2b": values_2b.index[:0], "csv_row": values_csv.index[:0]})
+
+    matches = pd.concat(rounds).astype("int64").sort_values("row_2b")
+    return pd.DataFrame({
+        "row_2b": values_2b.index[matches["row_2b"].to_numpy()],
+        "csv_row": values_csv.index[matches["csv_row"].to_numpy()]
+    })
+
+def match_invoices(df_2b, df_csv):
+    """
+    Pair GSTR-2B invoices with purchase register rows.
+
+    Key columns are encoded once as shared integer codes, so each exact strategy
+    is a single hash join on integers: the first pending GSTR-2B invoice per key
+    is paired with the first register row for that key, and every register row
+    sharing the key is marked as processed. Invoices left over after the exact
+    strategies fall back to a fuzzy match on amount within the same GSTIN.
+
+    Args:
+        df_2b (DataFrame): GSTR-2B invoices with normalized invoice number columns
+        df_csv (DataFrame): Purchase register rows with normalized invoice number columns
+
+    Returns:
+        tuple: (GSTR-2B rows with csv_inv_num, csv_taxable_value and csv_rate columns,
+                unmatched GSTR-2B rows, unmatched purchase register rows,
+                number of pairs found by the fuzzy amount match)
+    """
+    key_columns = list(dict.fromkeys(col for keys in MATCH_KEYS for col in keys))
+    codes_2b, codes_csv = factorize_keys(df_2b, df_csv, key_columns)
+    # Work with row positions; matched rows are flagged instead of dropped
+    codes_2b = codes_2b.reset_index(drop=True)
+    codes_csv = codes_csv.reset_index(drop=True)
+    matched_2b = np.zeros(len(df_2b), dtype=bool)
+    used_csv = np.zeros(len(df_csv), dtype=bool)
+    # Only invoices that have a numeric part can match on it
+    has_num_only = (df_2b["num_only"] != "").to_numpy()
+    pairs_2b = [np.empty(0, dtype="int64")]
+    pairs_csv = [np.empty(0, dtype="int64")]
+
+    for keys in MATCH_KEYS:
+        candidates = ~matched_2b
+        if "num_only" in keys:
+            candidates &= has_num_only
+        if not candidates.any() or used_csv.all():
+            continue
+
+        candidate_keys = codes_2b.loc[candidates, keys]
+        candidate_keys = candidate_keys[(candidate_keys >= 0).all(axis=1) & ~candidate_keys.duplicated()]
+        available_keys = pd.MultiIndex.from_frame(codes_csv.loc[~used_csv, keys])
+        available_rows = pd.Series(np.flatnonzero(~used_csv), index=available_keys, name="csv_row")
+        available_rows = available_rows[~available_keys.duplicated()]
+
+        hits = candidate_keys.join(available_rows, on=keys, how="inner")
+        if hits.empty:
+            continue
+
+        pairs_2b.append(hits.index.to_numpy())
+        pairs_csv.append(hits["csv_row"].to_numpy())
+        # Mark as processed to avoid duplicate matches
+        matched_2b[hits.index] = True
+        used_csv[np.flatnonzero(~used_csv)[available_keys.isin(pd.MultiIndex.from_frame(hits[keys]))]] = True
+
+    # Strategy 4: Try fuzzy match on amount (if GSTIN matches but invoice doesn't)
+    values_2b = df_2b["taxable_value"].reset_index(drop=True)
+    values_csv = df_csv["taxable_value"].reset_index(drop=True)
+    fuzzy = fuzzy_match_invoices(
+        values_2b[~matched_2b], codes_2b.loc[~matched_2b, "gstin"],
+        values_csv[~used_csv], codes_csv.loc[~used_csv, "gstin"]
+    )
+    if not fuzzy.empty:
+        pairs_2b.append(fuzzy["row_2b"].to_numpy())
+        pairs_csv.append(fuzzy["csv_row"].to_numpy())
+        matched_2b[fuzzy["row_2b"]] = True
+        used_csv[fuzzy["csv_row"]] = True
+
+    # Keep GSTR-2B order in the results
+    rows_2b = np.concatenate(pairs_2b)
+    order = np.argsort(rows_2b, kind="stable")
+    csv_rows = df_csv.iloc[np.concatenate(pairs_csv)[order]]
+    paired = df_2b.iloc[rows_2b[order]].assign(
+        csv_inv_num=csv_rows["inv_num"].to_numpy(),
+        csv_taxable_value=csv_rows["taxable_value"].to_numpy(),
+        csv_rate=csv_rows["rate"].to_numpy()
+    )
+
+    return paired, df_2b[~matched_2b], df_csv[~used_csv], len(fuzzy)
+
+@st.cache_data(show_spinner=False)
+def reconcile(df_2b, df_csv):
+    """
+    Match GSTR-2B invoices against the purchase register and classify the pairs.
+
+    Cached on the contents of both tables, so reruns with the same files skip matching.
+
+    Args:
+        df_2b (DataFrame): Prepared GSTR-2B invoices
+        df_csv (DataFrame): Prepared purchase register rows
+
+    Returns:
+        tuple: (matched, mismatched, missing in purchase register and missing in GSTR-2B
+                DataFrames, number of fuzzy matches)
+    """
+    # Match by GSTIN + Invoice Number with multiple matching strategies
+    paired, missing_csv_df, missing_json_df, fuzzy_count = match_invoices(df_2b, df_csv)
+
+    # Use a percentage threshold for amount matching
+    value_diff = paired["csv_taxable_value"] - paired["taxable_value"]
+    abs_diff = value_diff.abs()
+    value_percent_diff = (abs_diff / paired["taxable_value"] * 100).where(paired["taxable_value"] > 0, 100)
+
+    # More flexible matching criteria
+    # Consider matched if within 10% or within 100 rupees absolute difference
+    value_matched = (value_percent_diff < 10) | (abs_diff < 100)
+
+    # Rate can be 0 in some cases when we couldn't determine it
+    rate_matched = (paired["csv_rate"] == paired["rate"]) | (paired["rate"] == 0) | (paired["csv_rate"] == 0)
+
+    is_match = value_matched & rate_matched
+    matched_df = paired.loc[is_match, [*df_2b.columns, "csv_inv_num", "csv_taxable_value"]]
+    matched_df["exact_match"] = matched_df["inv_num"] == matched_df["csv_inv_num"]
+    mismatched_df = paired.loc[~is_match, [*df_2b.columns, "csv_inv_num", "csv_taxable_value", "csv_rate"]]
+    mismatched_df["diff_value"] = value_diff[~is_match].round(2)
+    mismatched_df["diff_percent"] = value_percent_diff[~is_match].round(2)
+
+    return (
+        matched_df.reset_index(drop=True),
+        mismatched_df.reset_index(drop=True),
+        missing_csv_df.reset_index(drop=True),
+        missing_json_df.reset_index(drop=True),
+        fuzzy_count
+    )
+
+# --- Result Export ---
+def to_csv_bytes(df):
+    """
+    Serialize a result table to CSV for download.
+
+    Uses pyarrow's multithreaded CSV writer when available, falling back to pandas.
+
+    Args:
+        df (DataFrame): Result table
+
+    Returns:
+        bytes: CSV content without the index
+    """
+    if pa is not None:
+        try:
+            buffer = io.BytesIO()
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            pa_csv.write_csv(table, buffer, pa_csv.WriteOptions(quoting_style="needed"))
+            return buffer.getvalue()
+        except (pa.ArrowException, TypeError, ValueError):
+            # Column types the Arrow writer cannot handle
+            pass
+    return df.to_csv(index=False).encode("utf-8")
 
 # --- Streamlit UI ---
 st.set_page_config(page_title="GSTR-2B vs Purchase Register Reconciliation", layout="wide")
@@ -15,136 +740,28 @@ purchase_file = st.file_uploader("Upload Purchase Register (CSV) file", type="cs
 
 if gstr2b_file and purchase_file:
     # --- Load GSTR-2B JSON ---
-    gstr2b_data = json.load(gstr2b_file)
-    gstr2b_records = []
+    df_2b, sample_json, root_keys = parse_gstr2b(gstr2b_file.getvalue())
     
     # Display JSON structure for debugging
     st.subheader("GSTR-2B Structure")
-    sample_json = {}
-    if "data" in gstr2b_data and "docdata" in gstr2b_data["data"]:
-        if "b2b" in gstr2b_data["data"]["docdata"] and len(gstr2b_data["data"]["docdata"]["b2b"]) > 0:
-            sample_party = gstr2b_data["data"]["docdata"]["b2b"][0]
-            if "inv" in sample_party and len(sample_party["inv"]) > 0:
-                sample_json = {
-                    "structure": "party -> inv -> details",
-                    "sample_invoice": sample_party["inv"][0]
-                }
     st.json(sample_json)
     
-    # Check if b2b data exists
-    if "data" in gstr2b_data and "docdata" in gstr2b_data["data"] and "b2b" in gstr2b_data["data"]["docdata"]:
-        for party in gstr2b_data["data"]["docdata"]["b2b"]:
-            gstin = party["ctin"]
-            for inv in party["inv"]:
-                # Initialize variables
-                txval = 0
-                rt = 0
-                inv_num = inv.get("inum", "UNKNOWN").strip().upper()
-                inv_date = inv.get("dt", "")
-                pos = inv.get("pos", "")
-                
-                # Extract tax values
-                igst_amt = float(inv.get("igst", 0))
-                cgst_amt = float(inv.get("cgst", 0))
-                sgst_amt = float(inv.get("sgst", 0))
-                
-                # Handle the case where 'items' might be present
-                if "items" in inv and len(inv["items"]) > 0:
-                    # Use item level data
-                    item = inv["items"][0]  # assuming first item per invoice
-                    txval = float(item.get("txval", 0))
-                    rt = item.get("rt", 0)
-                else:
-                    # Try to use invoice level data
-                    if "txval" in inv:
-                        txval = float(inv["txval"])
-                    
-                    # Determine rate from tax amounts if not directly available
-                    if rt == 0:
-                        # Calculate total tax
-                        total_tax = igst_amt + cgst_amt + sgst_amt
-                        
-                        # If there's a taxable value and tax amount, derive rate
-                        if txval > 0 and total_tax > 0:
-                            if igst_amt > 0:
-                                rt = round((igst_amt / txval) * 100)
-                            elif cgst_amt > 0 and sgst_amt > 0:
-                                rt = round(((cgst_amt + sgst_amt) / txval) * 100)
-                
-                # Determine supply type from tax composition rather than POS
-                supply_type = "INTER" if igst_amt > 0 else "INTRA"
-                
-                # Only add records with some taxable value
-                if txval > 0:
-                    gstr2b_records.append({
-                        "gstin": gstin.upper(),
-                        "inv_num": inv_num,
-                        "date": inv_date,
-                        "taxable_value": round(txval, 2),
-                        "rate": rt,
-                        "supply_type": supply_type
-                    })
-    else:
+    if root_keys is not None:
         # Try to handle other possible structures
         st.warning("Standard GSTR-2B structure not found. Attempting to parse alternative formats...")
         
         # Add debug info
-        st.json({"keys_in_data": list(gstr2b_data.keys())})
-        
-        # Try alternate parsing based on common structures
-        if "b2b" in gstr2b_data:
-            # Direct b2b array at root level
-            for party in gstr2b_data["b2b"]:
-                gstin = party.get("ctin", "")
-                if "inv" in party:
-                    for inv in party["inv"]:
-                        # Extract data using similar logic as above
-                        txval = 0
-                        rt = 0
-                        igst_amt = float(inv.get("igst", 0))
-                        cgst_amt = float(inv.get("cgst", 0))
-                        sgst_amt = float(inv.get("sgst", 0))
-                        
-                        if "items" in inv and len(inv["items"]) > 0:
-                            item = inv["items"][0]
-                            txval = float(item.get("txval", 0))
-                            rt = item.get("rt", 0)
-                        else:
-                            txval = float(inv.get("txval", 0))
-                            
-                            # Determine rate from tax amounts if not available
-                            if rt == 0 and txval > 0:
-                                total_tax = igst_amt + cgst_amt + sgst_amt
-                                if total_tax > 0:
-                                    if igst_amt > 0:
-                                        rt = round((igst_amt / txval) * 100)
-                                    elif cgst_amt > 0 and sgst_amt > 0:
-                                        rt = round(((cgst_amt + sgst_amt) / txval) * 100)
-                        
-                        # Determine supply type from tax composition
-                        supply_type = "INTER" if igst_amt > 0 else "INTRA"
-                        
-                        if txval > 0:
-                            gstr2b_records.append({
-                                "gstin": gstin.upper(),
-                                "inv_num": inv.get("inum", "").strip().upper(),
-                                "date": inv.get("dt", ""),
-                                "taxable_value": round(txval, 2),
-                                "rate": rt,
-                                "supply_type": supply_type
-                            })
+        st.json({"keys_in_data": root_keys})
         
-        if not gstr2b_records:
+        if df_2b.empty:
             st.error("❌ Could not parse the GSTR-2B file structure. Please check the format.")
 
-    if not gstr2b_records:
+    if df_2b.empty:
         st.error("❌ No valid invoice records found in the GSTR-2B data.")
     else:
-        df_2b = pd.DataFrame(gstr2b_records)
-
         # --- Load Purchase Register CSV ---
         try:
-            df_csv = pd.read_csv(purchase_file)
+            df_csv = load_purchase_register(purchase_file.getvalue())
         except Exception as e:
             st.error(f"❌ Error reading CSV file: {e}")
             st.stop()
@@ -157,13 +774,6 @@ if gstr2b_file and purchase_file:
         st.subheader("CSV File Columns")
         st.write(df_csv.columns.tolist())
         
-        # Convert numeric columns to float, handling non-numeric values
-        for col in df_csv.columns:
-            if col in ["Gross Total", "CGST", "SGST", "IGST", "Purchase Local @18%", 
-                       "Purchase Interstate @18%", "Vechile Repair & Maintance Exp. (Local @18%)",
-                       "Vechile Repair & Miantance Exp. (Local @28%)", "VECHILE REPAIR & MAINTANCE EXP. (INTERSTATE @28%)"]:
-                df_csv[col] = pd.to_numeric(df_csv[col], errors='coerce').fillna(0)
-        
         # Map the specific columns from your CSV to required fields
         column_rename_map = {
             "Voucher No.": "inv_num",
@@ -171,77 +781,8 @@ if gstr2b_file and purchase_file:
             "GSTIN/UIN": "gstin"
         }
         
-        # Create a derive taxable value and rate function
-        def derive_tax_info(row):
-            taxable_val = 0
-            applicable_rate = 0
-            supply_type = "INTRA"  # Default
-            
-            # Check each local tax rate column
-            local_rate_columns = {
-                "Purchase Local @18%": 18,
-                "Vechile Repair & Maintance Exp. (Local @18%)": 18,
-                "Vechile Repair & Miantance Exp. (Local @28%)": 28
-            }
-            
-            interstate_rate_columns = {
-                "Purchase Interstate @18%": 18,
-                "VECHILE REPAIR & MAINTANCE EXP. (INTERSTATE @28%)": 28
-            }
-            
-            # Check local rate columns
-            for col, rate in local_rate_columns.items():
-                if col in row and pd.notna(row[col]) and row[col] > 0:
-                    taxable_val += row[col]
-                    applicable_rate = rate
-                    supply_type = "INTRA"
-            
-            # Check interstate rate columns
-            for col, rate in interstate_rate_columns.items():
-                if col in row and pd.notna(row[col]) and row[col] > 0:
-                    taxable_val += row[col]
-                    applicable_rate = rate
-                    supply_type = "INTER"
-            
-            # If no taxable value found, use Gross Total and determine type from taxes
-            if taxable_val == 0 and "Gross Total" in row and pd.notna(row["Gross Total"]) and row["Gross Total"] > 0:
-                # Determine if INTRA or INTER based on tax columns
-                if "IGST" in row and pd.notna(row["IGST"]) and row["IGST"] > 0:
-                    supply_type = "INTER"
-                    total_tax = row["IGST"]
-                    if total_tax > 0:
-                        taxable_val = row["Gross Total"] - total_tax
-                        applicable_rate = round((total_tax / taxable_val) * 100) if taxable_val > 0 else 0
-                    else:
-                        taxable_val = row["Gross Total"]
-                elif "CGST" in row and "SGST" in row and pd.notna(row["CGST"]) and pd.notna(row["SGST"]) and row["CGST"] > 0 and row["SGST"] > 0:
-                    supply_type = "INTRA"
-                    total_tax = row["CGST"] + row["SGST"]
-                    if total_tax > 0:
-                        taxable_val = row["Gross Total"] - total_tax
-                        applicable_rate = round((total_tax / taxable_val) * 100) if taxable_val > 0 else 0
-                    else:
-                        taxable_val = row["Gross Total"]
-                else:
-                    # If we can't determine, use Gross Total
-                    taxable_val = row["Gross Total"]
-                    # Try to infer rate from common rates
-                    if "Particulars" in row and isinstance(row["Particulars"], str):
-                        if "18%" in row["Particulars"]:
-                            applicable_rate = 18
-                        elif "28%" in row["Particulars"]:
-                            applicable_rate = 28
-                        elif "12%" in row["Particulars"]:
-                            applicable_rate = 12
-                        elif "5%" in row["Particulars"]:
-                            applicable_rate = 5
-                        else:
-                            applicable_rate = 18  # Default most common rate
-            
-            return pd.Series([taxable_val, applicable_rate, supply_type])
-        
-        # Apply the function to each row
-        df_csv[["taxable_value", "rate", "supply_type"]] = df_csv.apply(derive_tax_info, axis=1)
+        # Derive taxable value, rate and supply type for all rows at once
+        df_csv[["taxable_value", "rate", "supply_type"]] = derive_tax_info(df_csv)
         
         # Now rename columns
         df_csv.rename(columns=column_rename_map, inplace=True)
@@ -253,138 +794,35 @@ if gstr2b_file and purchase_file:
             # Standardize data - handle potential non-string columns
             df_csv["gstin"] = df_csv["gstin"].astype(str).str.upper().str.strip()
             df_csv["inv_num"] = df_csv["inv_num"].astype(str).str.upper().str.strip()
+
+            # Few distinct values per column, so store them as categoricals
+            for df in (df_2b, df_csv):
+                df["gstin"] = df["gstin"].astype("category")
+                df["supply_type"] = df["supply_type"].astype("category")
             
             # Handle date conversion with flexible formats
-            def convert_date_format(date_str):
-                try:
-                    if isinstance(date_str, str):
-                        # Try different date formats
-                        for fmt in ('%d-%m-%Y', '%d/%m/%Y', '%Y-%m-%d', '%m/%d/%Y', '%d-%b-%Y', '%d %b %Y'):
-                            try:
-                                return datetime.strptime(date_str, fmt).strftime('%d-%m-%Y')
-                            except:
-                                continue
-                    return date_str
-                except:
-                    return date_str
-            
-            df_csv["date"] = df_csv["date"].apply(convert_date_format)
-            df_2b["date"] = df_2b["date"].apply(convert_date_format)
-
-            # --- Create enhanced invoice number normalization ---
-            def normalize_invoice_num(inv_num):
-                if not isinstance(inv_num, str):
-                    return ""
-                
-                # Convert to uppercase
-                inv_num = inv_num.upper()
-                
-                # Remove all non-alphanumeric characters
-                clean_inv = re.sub(r'[^A-Z0-9]', '', inv_num)
-                
-                # Remove common prefixes
-                prefixes = ['INV', 'INVOICE', 'BILL', 'SI', 'TAX']
-                for prefix in prefixes:
-                    if clean_inv.startswith(prefix):
-                        clean_inv = clean_inv[len(prefix):]
-                
-                # Try to extract only the numeric part if it exists
-                num_only = re.sub(r'[^0-9]', '', clean_inv)
-                
-                # Return both versions for more matching options
-                return clean_inv, num_only
-            
+            df_csv["date"] = convert_date_format(df_csv["date"])
+            df_2b["date"] = convert_date_format(df_2b["date"])
+
             # Create normalized invoice columns
-            df_2b["norm_inv_num"], df_2b["num_only"] = zip(*df_2b["inv_num"].apply(normalize_invoice_num))
-            df_csv["norm_inv_num"], df_csv["num_only"] = zip(*df_csv["inv_num"].apply(normalize_invoice_num))
+            df_2b["norm_inv_num"], df_2b["num_only"] = normalize_invoice_nums(df_2b["inv_num"])
+            df_csv["norm_inv_num"], df_csv["num_only"] = normalize_invoice_nums(df_csv["inv_num"])
             
             # --- Reconciliation ---
-            matched = []
-            mismatched = []
-            missing_in_csv = []
-            missing_in_json = []
-
-            # Match by GSTIN + Invoice Number with multiple matching strategies
-            for _, row in df_2b.iterrows():
-                # Flag to track if a match was found
-                match_found = False
-                
-                # Strategy 1: Exact match on GSTIN + Invoice Number
-                match = df_csv[(df_csv["gstin"] == row["gstin"]) & (df_csv["inv_num"] == row["inv_num"])]
-                
-                # Strategy 2: Match on GSTIN + normalized invoice number
-                if match.empty:
-                    match = df_csv[(df_csv["gstin"] == row["gstin"]) & (df_csv["norm_inv_num"] == row["norm_inv_num"])]
-                
-                # Strategy 3: Match on GSTIN + numeric-only invoice number
-                if match.empty and row["num_only"]:
-                    match = df_csv[(df_csv["gstin"] == row["gstin"]) & (df_csv["num_only"] == row["num_only"])]
-                
-                # Strategy 4: Try fuzzy match on amount (if GSTIN matches but invoice doesn't)
-                if match.empty:
-                    # Find potential matches by GSTIN only
-                    gstin_matches = df_csv[df_csv["gstin"] == row["gstin"]]
-                    if not gstin_matches.empty:
-                        # Look for close match on amount (within 1% or ₹10)
-                        for _, csv_row in gstin_matches.iterrows():
-                            diff = abs(csv_row["taxable_value"] - row["taxable_value"])
-                            percent_diff = (diff / row["taxable_value"]) * 100 if row["taxable_value"] > 0 else 100
-                            
-                            if percent_diff < 1 or diff < 10:
-                                match = pd.DataFrame([csv_row])
-                                st.info(f"Found fuzzy match for invoice {row['inv_num']} based on amount similarity")
-                                break
-                
-                if match.empty:
-                    missing_in_csv.append(row.to_dict())
-                else:
-                    match_row = match.iloc[0]
-                    # Use a percentage threshold for amount matching
-                    value_diff = abs(match_row["taxable_value"] - row["taxable_value"])
-                    value_percent_diff = (value_diff / row["taxable_value"]) * 100 if row["taxable_value"] > 0 else 100
-                    
-                    # More flexible matching criteria
-                    # Consider matched if within 10% or within 100 rupees absolute difference
-                    value_matched = value_percent_diff < 10 or value_diff < 100
-                    
-                    # Rate can be 0 in some cases when we couldn't determine it
-                    rate_matched = match_row["rate"] == row["rate"] or row["rate"] == 0 or match_row["rate"] == 0
-                    
-                    if value_matched and rate_matched:
-                        matched.append({
-                            **row.to_dict(),
-                            "csv_inv_num": match_row["inv_num"],
-                            "csv_taxable_value": match_row["taxable_value"],
-                            "exact_match": row["inv_num"] == match_row["inv_num"]
-                        })
-                        # Mark as processed to avoid duplicate matches
-                        df_csv = df_csv.drop(match.index)
-                    else:
-                        mismatched.append({
-                            **row.to_dict(),
-                            "csv_inv_num": match_row["inv_num"],
-                            "csv_taxable_value": match_row["taxable_value"],
-                            "csv_rate": match_row["rate"],
-                            "diff_value": round(match_row["taxable_value"] - row["taxable_value"], 2),
-                            "diff_percent": round(value_percent_diff, 2)
-                        })
-                        # Mark as processed to avoid duplicate matches
-                        df_csv = df_csv.drop(match.index)
-
-            # Now check for records in CSV not in GSTR-2B
-            for _, row in df_csv.iterrows():
-                missing_in_json.append(row.to_dict())
-
-            total_invoices = len(df_2b) + len(df_csv.index.tolist())
+            matched_df, mismatched_df, missing_csv_df, missing_json_df, fuzzy_count = reconcile(df_2b, df_csv)
+            if fuzzy_count:
+                st.info(f"Found fuzzy matches for {fuzzy_count} invoices based on amount similarity")
+
+            total_invoices = len(df_2b) + len(missing_json_df)
             
             # Create summary statistics
             summary = {
                 "total_invoices": total_invoices,
-                "matched_count": len(matched),
-                "mismatched_count": len(mismatched),
-                "missing_in_csv_count": len(missing_in_csv),
-                "missing_in_json_count": len(missing_in_json),
-                "match_percentage": round((len(matched) / total_invoices) * 100, 2) if total_invoices > 0 else 0
+                "matched_count": len(matched_df),
+                "mismatched_count": len(mismatched_df),
+                "missing_in_csv_count": len(missing_csv_df),
+                "missing_in_json_count": len(missing_json_df),
+                "match_percentage": round((len(matched_df) / total_invoices) * 100, 2) if total_invoices > 0 else 0
             }
 
             st.success("✅ Reconciliation completed.")
@@ -405,50 +843,24 @@ if gstr2b_file and purchase_file:
             st.write("---")
             
             # Add download buttons for each dataframe
-            if matched:
-                st.write("### ✅ Matched Invoices")
-                matched_df = pd.DataFrame(matched)
-                st.dataframe(matched_df)
-                csv = matched_df.to_csv(index=False)
+            result_sections = [
+                ("### ✅ Matched Invoices", matched_df,
+                 "Download matched invoices as CSV", "matched_invoices.csv"),
+                ("### ⚠️ Mismatched Invoices", mismatched_df,
+                 "Download mismatched invoices as CSV", "mismatched_invoices.csv"),
+                ("### ❌ Missing in Purchase Register (CSV)", missing_csv_df,
+                 "Download missing in CSV invoices", "missing_in_csv.csv"),
+                ("### ❌ Missing in GSTR-2B (JSON)", missing_json_df,
+                 "Download missing in GSTR-2B invoices", "missing_in_json.csv")
+            ]
+            for heading, result_df, label, file_name in result_sections:
+                if result_df.empty:
+                    continue
+                st.write(heading)
+                st.dataframe(result_df)
                 st.download_button(
-                    label="Download matched invoices as CSV",
-                    data=csv,
-                    file_name="matched_invoices.csv",
+                    label=label,
+                    data=to_csv_bytes(result_df),
+                    file_name=file_name,
                     mime="text/csv",
                 )
-
-            if mismatched:
-                st.write("### ⚠️ Mismatched Invoices")
-                mismatched_df = pd.DataFrame(mismatched)
-                st.dataframe(mismatched_df)
-                csv = mismatched_df.to_csv(index=False)
-                st.download_button(
-                    label="Download mismatched invoices as CSV",
-                    data=csv,
-                    file_name="mismatched_invoices.csv",
-                    mime="text/csv",
-                )
-
-            if missing_in_csv:
-                st.write("### ❌ Missing in Purchase Register (CSV)")
-                missing_csv_df = pd.DataFrame(missing_in_csv)
-                st.dataframe(missing_csv_df)
-                csv = missing_csv_df.to_csv(index=False)
-                st.download_button(
-                    label="Download missing in CSV invoices",
-                    data=csv,
-                    file_name="missing_in_csv.csv",
-                    mime="text/csv",
-                )
-
-            if missing_in_json:
-                st.write("### ❌ Missing in GSTR-2B (JSON)")
-                missing_json_df = pd.DataFrame(missing_in_json)
-                st.dataframe(missing_json_df)
-                csv = missing_json_df.to_csv(index=False)
-                st.download_button(
-                    label="Download missing in GSTR-2B invoices",
-                    data=csv,
-                    file_name="missing_in_json.csv",
-                    mime="text/csv",
-                )
\ No newline at end of file
@@ -3,22 +3,61 @@ GSTR-1 vs Books (Sales Register) Reconciliation Module
 """
 import pandas as pd
 import numpy as np
+from utils.data_processor import share_categories
+from utils.excel_handler import read_mapped_excel
+from reconcilation.matching import pair_keys, key_positions, key_codes, amount_differences
 from config import GSTR1_BOOKS_MAPPING, AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD
 
+# Identifier columns are read as text so invoice numbers keep their exact form
+GSTR1_TEXT_COLUMNS = ["GSTIN/UIN of Recipient", "Invoice Number"]
+
 def standardize_columns(df):
     df.columns = df.columns.str.strip()
     return df
 
 def format_date_columns(df, columns):
     for col in columns:
-        df[col] = pd.to_datetime(df[col], errors='coerce')
+        # Excel date cells already arrive as datetimes
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
     return df
 
 def clean_numeric_data(df, numeric_cols):
     for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
     return df
 
+def match_key_frame(df):
+    """Invoice number, invoice day and GSTIN columns that both sides are merged on"""
+    return pd.DataFrame({
+        'Invoice Number': key_codes(df['Invoice Number']),
+        'Invoice Date': df['Invoice Date'].dt.normalize().array,
+        'GSTIN/UIN of Recipient': key_codes(df['GSTIN/UIN of Recipient'])
+    })
+
+INVOICE_RECORD_FIELDS = {
+    'Invoice Number': 'invoice_number',
+    'Invoice Date': 'invoice_date',
+    'GSTIN/UIN of Recipient': 'gstin',
+    'Invoice Value': 'value'
+}
+
+TAX_TOTAL_FIELDS = {
+    'Taxable Value': 'taxable_value',
+    'Integrated Tax': 'igst',
+    'Central Tax': 'cgst',
+    'State/UT Tax': 'sgst',
+    'Cess': 'cess'
+}
+
+def invoice_records(df, with_value=True):
+    """Summarise each invoice as an invoice_number/invoice_date/gstin(/value) dict"""
+    if with_value and 'Invoice Value' not in df.columns:
+        df = df.assign(**{'Invoice Value': None})
+    fields = {col: key for col, key in INVOICE_RECORD_FIELDS.items() if with_value or key != 'value'}
+    return df[list(fields)].rename(columns=fields).to_dict('records')
+
 class GSTR1BooksReconciliation:
     """Class to handle reconciliation between GSTR-1 and Books (Sales Register)"""
     
@@ -28,23 +67,30 @@ class GSTR1BooksReconciliation:
         self.amount_threshold = AMOUNT_THRESHOLD
         self.percentage_threshold = PERCENTAGE_THRESHOLD
         
-    def load_data(self, gstr1_file, books_file):
+    def load_data(self, gstr1_file, books_file, use_polars=False):
         """
         Load GSTR-1 and Books data from files
         
         Args:
             gstr1_file (str): Path to GSTR-1 data file
             books_file (str): Path to Books (Sales Register) data file
+            use_polars (bool): Parse the Excel files with Polars when installed
             
         Returns:
             tuple: Dataframes containing GSTR-1 and Books data
         """
+        numeric_cols = ["Invoice Value", "Taxable Value", "Integrated Tax", 
+                       "Central Tax", "State/UT Tax", "Cess", "Rate"]
+        
         try:
             # Load GSTR-1 data
-            gstr1_df = pd.read_excel(gstr1_file)
+            gstr1_df = read_mapped_excel(gstr1_file, set(self.mapping.keys()) | set(numeric_cols),
+                                         GSTR1_TEXT_COLUMNS, use_polars=use_polars)
             
             # Load Books (Sales Register) data
-            books_df = pd.read_excel(books_file)
+            books_df = read_mapped_excel(books_file, set(self.mapping.values()) | set(numeric_cols),
+                                         [self.mapping[col] for col in GSTR1_TEXT_COLUMNS],
+                                         use_polars=use_polars)
             
             # Standardize column names
             gstr1_df = standardize_columns(gstr1_df)
@@ -55,8 +101,6 @@ class GSTR1BooksReconciliation:
             books_df = format_date_columns(books_df, ["Invoice Date"])
             
             # Clean numeric data
-            numeric_cols = ["Invoice Value", "Taxable Value", "Integrated Tax", 
-                           "Central Tax", "State/UT Tax", "Cess", "Rate"]
             gstr1_df = clean_numeric_data(gstr1_df, numeric_cols)
             books_df = clean_numeric_data(books_df, numeric_cols)
             
@@ -82,13 +126,14 @@ class GSTR1BooksReconciliation:
         
         # Filter and rename columns
         try:
-            # Select required columns from GSTR-1 data (if they exist)
+            # Select required columns from GSTR-1 data (if they exist); the selection
+            # is already a new frame and is never modified in place, so no copy
             gstr1_available_cols = [col for col in gstr1_cols if col in gstr1_df.columns]
-            gstr1_mapped_df = gstr1_df[gstr1_available_cols].copy()
+            gstr1_mapped_df = gstr1_df[gstr1_available_cols]
             
             # Select required columns from Books data (if they exist)
             books_available_cols = [col for col in books_cols if col in books_df.columns]
-            books_mapped_df = books_df[books_available_cols].copy()
+            books_mapped_df = books_df[books_available_cols]
             
             # Create reverse mapping for renaming Books columns to match GSTR-1
             reverse_mapping = {v: k for k, v in self.mapping.items()}
@@ -116,95 +161,47 @@ class GSTR1BooksReconciliation:
             value_columns = ["Invoice Value", "Taxable Value", "Integrated Tax", 
                             "Central Tax", "State/UT Tax", "Cess"]
             
-            # Create key for matching
-            gstr1_df['match_key'] = gstr1_df.apply(
-                lambda x: f"{x['Invoice Number']}_{x['Invoice Date'].strftime('%Y-%m-%d')}_{x['GSTIN/UIN of Recipient']}", 
-                axis=1
-            )
+            # Shared categories mean each distinct invoice number/GSTIN is handled once
+            gstr1_df, books_df = share_categories(gstr1_df, books_df, ["Invoice Number", "GSTIN/UIN of Recipient"])
             
-            books_df['match_key'] = books_df.apply(
-                lambda x: f"{x['Invoice Number']}_{x['Invoice Date'].strftime('%Y-%m-%d')}_{x['GSTIN/UIN of Recipient']}", 
-                axis=1
-            )
+            # Pair the distinct keys of both sides by integer id; the positions point
+            # at the first record carrying each key
+            key_status = pair_keys(match_key_frame(gstr1_df), match_key_frame(books_df))
             
-            # Identify matching and non-matching records
-            gstr1_keys = set(gstr1_df['match_key'])
-            books_keys = set(books_df['match_key'])
+            # Records found in both sources
+            gstr1_common = gstr1_df.iloc[key_positions(key_status, 'both', 'left')]
+            books_common = books_df.iloc[key_positions(key_status, 'both', 'right')]
             
-            common_keys = gstr1_keys.intersection(books_keys)
-            only_in_gstr1 = gstr1_keys - books_keys
-            only_in_books = books_keys - gstr1_keys
+            # Check for value differences across all records and columns at once
+            compare_columns = [col for col in value_columns
+                               if col in gstr1_common.columns and col in books_common.columns]
+            gstr1_values = gstr1_common[compare_columns].to_numpy(dtype=np.float64, na_value=0.0)
+            books_values = books_common[compare_columns].to_numpy(dtype=np.float64, na_value=0.0)
             
-            # Records found in both sources
-            matches = []
-            mismatches = []
+            differs, percent_diff = amount_differences(gstr1_values, books_values,
+                                                       self.amount_threshold, self.percentage_threshold)
+            has_differences = differs.any(axis=1)
             
-            for key in common_keys:
-                gstr1_record = gstr1_df[gstr1_df['match_key'] == key].iloc[0]
-                books_record = books_df[books_df['match_key'] == key].iloc[0]
-                
-                # Check for value differences
-                differences = {}
-                has_differences = False
-                
-                for col in value_columns:
-                    if col in gstr1_record and col in books_record:
-                        gstr1_value = gstr1_record[col] if not pd.isna(gstr1_record[col]) else 0
-                        books_value = books_record[col] if not pd.isna(books_record[col]) else 0
-                        
-                        abs_diff = abs(gstr1_value - books_value)
-                        if abs_diff > self.amount_threshold:
-                            percent_diff = abs_diff / max(abs(gstr1_value), abs(books_value), 1) * 100 if max(abs(gstr1_value), abs(books_value)) > 0 else 0
-                            
-                            if percent_diff > self.percentage_threshold * 100:
-                                has_differences = True
-                                differences[col] = {
-                                    'gstr1': gstr1_value,
-                                    'books': books_value,
-                                    'difference': gstr1_value - books_value,
-                                    'percentage': percent_diff
-                                }
-                
-                if has_differences:
-                    mismatch = {
-                        'invoice_number': gstr1_record['Invoice Number'],
-                        'invoice_date': gstr1_record['Invoice Date'],
-                        'gstin': gstr1_record['GSTIN/UIN of Recipient'],
-                        'differences': differences
-                    }
-                    mismatches.append(mismatch)
-                else:
-                    match = {
-                        'invoice_number': gstr1_record['Invoice Number'],
-                        'invoice_date': gstr1_record['Invoice Date'],
-                        'gstin': gstr1_record['GSTIN/UIN of Recipient'],
-                        'value': gstr1_record['Invoice Value'] if 'Invoice Value' in gstr1_record else None
+            matches = invoice_records(gstr1_common[~has_differences])
+            
+            mismatch_rows = np.flatnonzero(has_differences)
+            mismatches = invoice_records(gstr1_common.iloc[mismatch_rows], with_value=False)
+            for mismatch, i in zip(mismatches, mismatch_rows):
+                mismatch['differences'] = {
+                    col: {
+                        'gstr1': gstr1_values[i, j],
+                        'books': books_values[i, j],
+                        'difference': gstr1_values[i, j] - books_values[i, j],
+                        'percentage': percent_diff[i, j]
                     }
-                    matches.append(match)
+                    for j, col in enumerate(compare_columns) if differs[i, j]
+                }
             
             # Records only in GSTR-1
-            missing_in_books = []
-            for key in only_in_gstr1:
-                record = gstr1_df[gstr1_df['match_key'] == key].iloc[0]
-                missing = {
-                    'invoice_number': record['Invoice Number'],
-                    'invoice_date': record['Invoice Date'],
-                    'gstin': record['GSTIN/UIN of Recipient'],
-                    'value': record['Invoice Value'] if 'Invoice Value' in record else None
-                }
-                missing_in_books.append(missing)
-                
+            missing_in_books = invoice_records(gstr1_df.iloc[key_positions(key_status, 'left_only', 'left')])
+
             # Records only in Books
-            missing_in_gstr1 = []
-            for key in only_in_books:
-                record = books_df[books_df['match_key'] == key].iloc[0]
-                missing = {
-                    'invoice_number': record['Invoice Number'],
-                    'invoice_date': record['Invoice Date'],
-                    'gstin': record['GSTIN/UIN of Recipient'],
-                    'value': record['Invoice Value'] if 'Invoice Value' in record else None
-                }
-                missing_in_gstr1.append(missing)
+            missing_in_gstr1 = invoice_records(books_df.iloc[key_positions(key_status, 'right_only', 'right')])
             
             # Summary metrics
             total_gstr1_records = len(gstr1_df)
@@ -215,29 +212,12 @@ class GSTR1BooksReconciliation:
             missing_in_gstr1_count = len(missing_in_gstr1)
             
             # Tax summary
-            gstr1_tax_total = {
-                'taxable_value': gstr1_df['Taxable Value'].sum() if 'Taxable Value' in gstr1_df else 0,
-                'igst': gstr1_df['Integrated Tax'].sum() if 'Integrated Tax' in gstr1_df else 0,
-                'cgst': gstr1_df['Central Tax'].sum() if 'Central Tax' in gstr1_df else 0,
-                'sgst': gstr1_df['State/UT Tax'].sum() if 'State/UT Tax' in gstr1_df else 0,
-                'cess': gstr1_df['Cess'].sum() if 'Cess' in gstr1_df else 0
-            }
-            
-            books_tax_total = {
-                'taxable_value': books_df['Taxable Value'].sum() if 'Taxable Value' in books_df else 0,
-                'igst': books_df['Integrated Tax'].sum() if 'Integrated Tax' in books_df else 0,
-                'cgst': books_df['Central Tax'].sum() if 'Central Tax' in books_df else 0,
-                'sgst': books_df['State/UT Tax'].sum() if 'State/UT Tax' in books_df else 0,
-                'cess': books_df['Cess'].sum() if 'Cess' in books_df else 0
-            }
+            gstr1_tax_sums = gstr1_df.reindex(columns=list(TAX_TOTAL_FIELDS), fill_value=0).sum().rename(TAX_TOTAL_FIELDS)
+            books_tax_sums = books_df.reindex(columns=list(TAX_TOTAL_FIELDS), fill_value=0).sum().rename(TAX_TOTAL_FIELDS)
             
-            tax_difference = {
-                'taxable_value': gstr1_tax_total['taxable_value'] - books_tax_total['taxable_value'],
-                'igst': gstr1_tax_total['igst'] - books_tax_total['igst'],
-                'cgst': gstr1_tax_total['cgst'] - books_tax_total['cgst'],
-                'sgst': gstr1_tax_total['sgst'] - books_tax_total['sgst'],
-                'cess': gstr1_tax_total['cess'] - books_tax_total['cess']
-            }
+            gstr1_tax_total = gstr1_tax_sums.to_dict()
+            books_tax_total = books_tax_sums.to_dict()
+            tax_difference = (gstr1_tax_sums - books_tax_sums).to_dict()
             
             # Results
             results = {
@@ -265,19 +245,20 @@ class GSTR1BooksReconciliation:
         except Exception as e:
             raise Exception(f"Error during reconciliation: {str(e)}")
     
-    def process(self, gstr1_file, books_file):
+    def process(self, gstr1_file, books_file, use_polars=False):
         """
         Process GSTR-1 and Books data for reconciliation
         
         Args:
             gstr1_file (str): Path to GSTR-1 data file
             books_file (str): Path to Books (Sales Register) data file
+            use_polars (bool): Parse the Excel files with Polars when installed
             
         Returns:
             dict: Reconciliation results
         """
         # Load data from files
-        gstr1_df, books_df = self.load_data(gstr1_file, books_file)
+        gstr1_df, books_df = self.load_data(gstr1_file, books_file, use_polars=use_polars)
         
         # Map columns based on defined mappings
         gstr1_mapped_df, books_mapped_df = self.map_columns(gstr1_df, books_df)
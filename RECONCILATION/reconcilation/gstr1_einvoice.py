@@ -3,16 +3,19 @@ Module to reconcile GSTR-1 data with E-invoice data.
 """
 
 import pandas as pd
-import numpy as np
+from utils.data_processor import share_categories
+from reconcilation.matching import reconcile_frames
 from config import GSTR1_EINVOICE_MAPPING, AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD
 
-def reconcile_gstr1_einvoice(gstr1_data, einvoice_data):
+def reconcile_gstr1_einvoice(gstr1_data, einvoice_data, as_tables=False):
     """
     Reconciles GSTR-1 data with E-invoice data to identify discrepancies.
     
     Args:
         gstr1_data (pd.DataFrame): DataFrame containing GSTR-1 data
         einvoice_data (pd.DataFrame): DataFrame containing E-invoice data
+        as_tables (bool): Return the invoice lists as pyarrow Tables instead of
+            lists of dicts
         
     Returns:
         dict: Dictionary containing reconciliation results
@@ -26,9 +29,14 @@ def reconcile_gstr1_einvoice(gstr1_data, einvoice_data):
     
     # Ensure date columns are in datetime format
     for df in [gstr1_renamed, einvoice_renamed]:
-        if "Invoice Date" in df.columns:
+        if "Invoice Date" in df.columns and not pd.api.types.is_datetime64_any_dtype(df["Invoice Date"]):
             df["Invoice Date"] = pd.to_datetime(df["Invoice Date"], errors='coerce')
     
+    # Shared categories let the key merge compare integer codes instead of strings
+    gstr1_renamed, einvoice_renamed = share_categories(
+        gstr1_renamed, einvoice_renamed, ["Invoice Number", "GSTIN/UIN of Recipient"]
+    )
+    
     # Prepare results dictionary
     results = {
         "matched_invoices": [],
@@ -45,84 +53,24 @@ def reconcile_gstr1_einvoice(gstr1_data, einvoice_data):
         }
     }
 
-    # Identify missing invoices in GSTR-1
-    einvoice_keys = set(einvoice_renamed[key_columns].dropna().apply(tuple, axis=1))
-    gstr1_keys = set(gstr1_renamed[key_columns].dropna().apply(tuple, axis=1))
-    
-    missing_in_gstr1_keys = einvoice_keys - gstr1_keys
-    missing_in_einvoice_keys = gstr1_keys - einvoice_keys
+    value_columns = [
+        "Invoice Value", "Taxable Value", "Integrated Tax", 
+        "Central Tax", "State/UT Tax", "Cess"
+    ]
     
-    # Find invoices missing in GSTR-1
-    for key in missing_in_gstr1_keys:
-        mask = (einvoice_renamed["Invoice Number"] == key[0]) & \
-               (einvoice_renamed["Invoice Date"] == key[1]) & \
-               (einvoice_renamed["GSTIN/UIN of Recipient"] == key[2])
-        
-        missing_invoices = einvoice_renamed[mask].copy()
-        results["missing_in_gstr1"].extend(missing_invoices.to_dict("records"))
+    matching = reconcile_frames(
+        gstr1_renamed, einvoice_renamed, key_columns, value_columns, [], "einvoice",
+        rtol=PERCENTAGE_THRESHOLD, atol=AMOUNT_THRESHOLD, as_tables=as_tables
+    )
     
+    results["missing_in_gstr1"] = matching["missing_in_left"]
     results["summary"]["missing_in_gstr1_count"] = len(results["missing_in_gstr1"])
     
-    # Find invoices missing in E-invoice
-    for key in missing_in_einvoice_keys:
-        mask = (gstr1_renamed["Invoice Number"] == key[0]) & \
-               (gstr1_renamed["Invoice Date"] == key[1]) & \
-               (gstr1_renamed["GSTIN/UIN of Recipient"] == key[2])
-        
-        missing_invoices = gstr1_renamed[mask].copy()
-        results["missing_in_einvoice"].extend(missing_invoices.to_dict("records"))
-    
+    results["missing_in_einvoice"] = matching["missing_in_right"]
     results["summary"]["missing_in_einvoice_count"] = len(results["missing_in_einvoice"])
     
-    # Compare matching invoices for discrepancies
-    common_keys = gstr1_keys.intersection(einvoice_keys)
-    
-    for key in common_keys:
-        gstr1_mask = (gstr1_renamed["Invoice Number"] == key[0]) & \
-                     (gstr1_renamed["Invoice Date"] == key[1]) & \
-                     (gstr1_renamed["GSTIN/UIN of Recipient"] == key[2])
-                     
-        einvoice_mask = (einvoice_renamed["Invoice Number"] == key[0]) & \
-                         (einvoice_renamed["Invoice Date"] == key[1]) & \
-                         (einvoice_renamed["GSTIN/UIN of Recipient"] == key[2])
-        
-        gstr1_row = gstr1_renamed[gstr1_mask].iloc[0]
-        einvoice_row = einvoice_renamed[einvoice_mask].iloc[0]
-        
-        # Check for discrepancies in amount fields
-        has_discrepancy = False
-        discrepancies = []
-        
-        value_columns = [
-            "Invoice Value", "Taxable Value", "Integrated Tax", 
-            "Central Tax", "State/UT Tax", "Cess"
-        ]
-        
-        for col in value_columns:
-            if col in gstr1_row and col in einvoice_row:
-                gstr1_val = pd.to_numeric(gstr1_row[col], errors='coerce') or 0
-                einvoice_val = pd.to_numeric(einvoice_row[col], errors='coerce') or 0
-                
-                if not np.isclose(gstr1_val, einvoice_val, rtol=PERCENTAGE_THRESHOLD, atol=AMOUNT_THRESHOLD):
-                    has_discrepancy = True
-                    diff = float(gstr1_val) - float(einvoice_val)
-                    diff_percent = (diff / float(einvoice_val) * 100) if einvoice_val != 0 else np.inf
-                    
-                    discrepancies.append({
-                        "field": col,
-                        "gstr1_value": float(gstr1_val),
-                        "einvoice_value": float(einvoice_val),
-                        "difference": diff,
-                        "difference_percent": diff_percent
-                    })
-        
-        # Add to appropriate result list
-        combined_row = {**gstr1_row.to_dict(), **{"discrepancies": discrepancies}} if has_discrepancy else gstr1_row.to_dict()
-        
-        if has_discrepancy:
-            results["mismatched_invoices"].append(combined_row)
-        else:
-            results["matched_invoices"].append(combined_row)
+    results["matched_invoices"] = matching["matched"]
+    results["mismatched_invoices"] = matching["mismatched"]
     
     # Update summary
     results["summary"]["matched_count"] = len(results["matched_invoices"])
@@ -1,10 +1,18 @@
 """
 GSTR-2A/2B vs Books (Purchase Register) Reconciliation Module
 """
+import os
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
+from utils.data_processor import share_categories
+from utils.excel_handler import read_mapped_excel
+from reconcilation.matching import pair_keys, key_positions, key_codes, amount_differences
 from config import GSTR2_BOOKS_MAPPING, AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD
 
+# Identifier columns are read as text, which pandas stores as Arrow strings
+GSTR2_TEXT_COLUMNS = ["Invoice Number", "GSTIN of Supplier"]
+
 def standardize_columns(df):
     """
     Standardize dataframe column names by stripping whitespace and converting to title case.
@@ -17,17 +25,104 @@ def format_date_columns(df, date_columns):
     Convert columns in date_columns to datetime format.
     """
     for col in date_columns:
-        df[col] = pd.to_datetime(df[col], errors='coerce')
+        # Excel date cells already arrive as datetimes
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
     return df
 
 def clean_numeric_data(df, numeric_cols):
     """
     Clean numeric columns by converting them to numeric dtype.
     """
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Only columns that did not parse as numbers need coercing, all in one go
+    text_cols = [col for col in numeric_cols if not pd.api.types.is_numeric_dtype(df[col])]
+    if text_cols:
+        df[text_cols] = df[text_cols].apply(pd.to_numeric, errors='coerce')
     return df
 
+def match_key_frame(df):
+    """
+    Invoice number, invoice day and supplier GSTIN columns that both sides are matched on.
+    Numbers and GSTINs compare as text and dates by calendar day, without formatting them;
+    the GSTIN column is expected to hold categories shared by both sides.
+    """
+    return pd.DataFrame({
+        'Invoice Number': df['Invoice Number'].fillna('').astype(str).array,
+        'Invoice Date': df['Invoice Date'].dt.normalize().array,
+        'GSTIN of Supplier': key_codes(df['GSTIN of Supplier'])
+    })
+
+TAX_TOTAL_FIELDS = {
+    'Taxable Value': 'taxable_value',
+    'Integrated Tax': 'igst',
+    'Central Tax': 'cgst',
+    'State/UT Tax': 'sgst',
+    'Cess': 'cess'
+}
+
+INVOICE_RECORD_FIELDS = {
+    'Invoice Number': 'invoice_number',
+    'Invoice Date': 'invoice_date',
+    'GSTIN of Supplier': 'gstin',
+    'Trade/Legal Name': 'supplier_name',
+    'Invoice Value': 'value',
+    'GSTR_Type': 'gstr_type'
+}
+
+# Stand-ins for optional columns a file does not have
+INVOICE_RECORD_DEFAULTS = {
+    'Trade/Legal Name': '',
+    'Invoice Value': None,
+    'GSTR_Type': '2B'
+}
+
+def with_record_defaults(df, with_type=True):
+    """
+    Add the optional invoice record columns a file does not have, once per source,
+    so building the records never has to check for them.
+    """
+    absent = {col: default for col, default in INVOICE_RECORD_DEFAULTS.items()
+              if col not in df.columns and (with_type or col != 'GSTR_Type')}
+    return df.assign(**absent) if absent else df
+
+def invoice_frame(df, with_value=True, with_type=True):
+    """
+    Project each invoice to invoice_number/invoice_date/gstin/supplier_name(/value)(/gstr_type) columns.
+    Expects the optional columns to be filled in by with_record_defaults.
+    """
+    fields = {col: key for col, key in INVOICE_RECORD_FIELDS.items()
+              if (with_value or key != 'value') and (with_type or key != 'gstr_type')}
+    return df[list(fields)].rename(columns=fields)
+
+def invoice_records(df, with_value=True, with_type=True):
+    """
+    Summarise each invoice as a dict of the invoice_frame columns.
+    """
+    return invoice_frame(df, with_value, with_type).to_dict('records')
+
+def difference_frame(invoices, columns, gstr2_values, books_values, percent_diff, differs):
+    """
+    One row per amount over the thresholds: the invoice columns plus the field and its
+    gstr2/books/difference/percentage values, the flat form of a mismatch's 'differences'.
+    """
+    rows, cols = np.nonzero(differs)
+    return invoices.iloc[rows].reset_index(drop=True).assign(
+        field=np.asarray(columns, dtype=object)[cols],
+        gstr2=gstr2_values[rows, cols],
+        books=books_values[rows, cols],
+        difference=gstr2_values[rows, cols] - books_values[rows, cols],
+        percentage=percent_diff[rows, cols]
+    )
+
+ITC_TAX_COLUMNS = ['Integrated Tax', 'Central Tax', 'State/UT Tax', 'Cess']
+
+def tax_totals(df):
+    """
+    Sum every tax column in one NumPy reduction; absent columns and blanks count as 0.
+    """
+    totals = df.reindex(columns=list(TAX_TOTAL_FIELDS), fill_value=0).to_numpy(dtype=np.float64, na_value=0.0).sum(axis=0)
+    return dict(zip(TAX_TOTAL_FIELDS.values(), totals))
+
 class GSTR2BooksReconciliation:
     """Class to handle reconciliation between GSTR-2A/2B and Books (Purchase Register)"""
     
@@ -37,7 +132,7 @@ class GSTR2BooksReconciliation:
         self.amount_threshold = AMOUNT_THRESHOLD
         self.percentage_threshold = PERCENTAGE_THRESHOLD
         
-    def load_data(self, gstr2_file, books_file, gstr_type="2B"):
+    def load_data(self, gstr2_file, books_file, gstr_type="2B", use_polars=False):
         """
         Load GSTR-2A/2B and Books data from files
         
@@ -45,16 +140,22 @@ class GSTR2BooksReconciliation:
             gstr2_file (str): Path to GSTR-2A/2B data file
             books_file (str): Path to Books (Purchase Register) data file
             gstr_type (str): Type of GSTR-2 file ('2A' or '2B')
+            use_polars (bool): Parse the Excel files with Polars when installed
             
         Returns:
             tuple: Dataframes containing GSTR-2A/2B and Books data
         """
         try:
-            # Load GSTR-2A/2B data
-            gstr2_df = pd.read_excel(gstr2_file)
-            
-            # Load Books (Purchase Register) data
-            books_df = pd.read_excel(books_file)
+            # Load GSTR-2A/2B and Books (Purchase Register) data side by side;
+            # hashing, Parquet and calamine parsing run outside the GIL
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                gstr2_future = executor.submit(read_mapped_excel, gstr2_file, text_columns=GSTR2_TEXT_COLUMNS,
+                                               use_polars=use_polars)
+                books_future = executor.submit(read_mapped_excel, books_file,
+                                               text_columns=[self.mapping[col] for col in GSTR2_TEXT_COLUMNS],
+                                               use_polars=use_polars)
+                gstr2_df = gstr2_future.result()
+                books_df = books_future.result()
             
             # Standardize column names
             gstr2_df = standardize_columns(gstr2_df)
@@ -70,8 +171,8 @@ class GSTR2BooksReconciliation:
             gstr2_df = clean_numeric_data(gstr2_df, numeric_cols)
             books_df = clean_numeric_data(books_df, numeric_cols)
             
-            # Add GSTR type column for reference
-            gstr2_df['GSTR_Type'] = gstr_type
+            # Add GSTR type column for reference; one value for the whole file
+            gstr2_df['GSTR_Type'] = pd.Series(gstr_type, index=gstr2_df.index, dtype='category')
             
             return gstr2_df, books_df
             
@@ -95,16 +196,17 @@ class GSTR2BooksReconciliation:
         
         # Filter and rename columns
         try:
-            # Select required columns from GSTR-2A/2B data (if they exist)
+            # Select required columns from GSTR-2A/2B data (if they exist); the selection
+            # is already a new frame and is never modified in place, so no copy
             gstr2_available_cols = [col for col in gstr2_cols if col in gstr2_df.columns]
             # Add GSTR_Type column if it exists
             if 'GSTR_Type' in gstr2_df.columns:
                 gstr2_available_cols.append('GSTR_Type')
-            gstr2_mapped_df = gstr2_df[gstr2_available_cols].copy()
+            gstr2_mapped_df = gstr2_df[gstr2_available_cols]
             
             # Select required columns from Books data (if they exist)
             books_available_cols = [col for col in books_cols if col in books_df.columns]
-            books_mapped_df = books_df[books_available_cols].copy()
+            books_mapped_df = books_df[books_available_cols]
             
             # Create reverse mapping for renaming Books columns to match GSTR-2A/2B
             reverse_mapping = {v: k for k, v in self.mapping.items()}
@@ -115,16 +217,20 @@ class GSTR2BooksReconciliation:
         except Exception as e:
             raise Exception(f"Error mapping columns: {str(e)}")
     
-    def reconcile(self, gstr2_df, books_df):
+    def reconcile(self, gstr2_df, books_df, sink_dir=None):
         """
         Reconcile GSTR-2A/2B data with Books data
         
         Args:
             gstr2_df (DataFrame): GSTR-2A/2B data with mapped columns
             books_df (DataFrame): Books data with mapped columns
+            sink_dir (str, optional): Directory to write the matches, mismatches and
+                missing entries to as Parquet files instead of returning them as lists
+                of dicts; mismatches are written one row per differing amount
             
         Returns:
-            dict: Reconciliation results with matches, mismatches, missing entries
+            dict: Reconciliation results with matches, mismatches, missing entries;
+                with sink_dir, the summaries plus the written file paths under 'files'
         """
         try:
             # Identify key columns for matching
@@ -132,135 +238,85 @@ class GSTR2BooksReconciliation:
             value_columns = ["Invoice Value", "Taxable Value", "Integrated Tax", 
                             "Central Tax", "State/UT Tax", "Cess"]
             
-            # Create key for matching
-            gstr2_df['match_key'] = gstr2_df.apply(
-                lambda x: f"{x['Invoice Number']}_{x['Invoice Date'].strftime('%Y-%m-%d')}_{x['GSTIN of Supplier']}", 
-                axis=1
-            )
+            # Supplier GSTINs repeat across many invoices; shared categories let
+            # the key pairing work on their integer codes
+            gstr2_df, books_df = share_categories(gstr2_df, books_df, ['GSTIN of Supplier'])
             
-            books_df['match_key'] = books_df.apply(
-                lambda x: f"{x['Invoice Number']}_{x['Invoice Date'].strftime('%Y-%m-%d')}_{x['GSTIN of Supplier']}", 
-                axis=1
-            )
+            # Settle which optional record columns exist up front, not per record set
+            gstr2_df = with_record_defaults(gstr2_df)
+            books_df = with_record_defaults(books_df, with_type=False)
             
-            # Identify matching and non-matching records
-            gstr2_keys = set(gstr2_df['match_key'])
-            books_keys = set(books_df['match_key'])
+            # Pair the distinct keys of both sides; the positions point at the
+            # first record carrying each key
+            key_status = pair_keys(match_key_frame(gstr2_df), match_key_frame(books_df))
             
-            common_keys = gstr2_keys.intersection(books_keys)
-            only_in_gstr2 = gstr2_keys - books_keys
-            only_in_books = books_keys - gstr2_keys
+            gstr2_common = gstr2_df.iloc[key_positions(key_status, 'both', 'left')]
+            books_common = books_df.iloc[key_positions(key_status, 'both', 'right')]
             
-            # Records found in both sources
-            matches = []
-            mismatches = []
+            # Check for value differences across all pairs and columns at once; blank
+            # amounts count as 0 here only, the records keep them blank
+            compare_columns = [col for col in value_columns
+                               if col in gstr2_df.columns and col in books_df.columns]
+            gstr2_values = gstr2_common[compare_columns].to_numpy(dtype=np.float64, na_value=0.0)
+            books_values = books_common[compare_columns].to_numpy(dtype=np.float64, na_value=0.0)
             
-            for key in common_keys:
-                gstr2_record = gstr2_df[gstr2_df['match_key'] == key].iloc[0]
-                books_record = books_df[books_df['match_key'] == key].iloc[0]
-                
-                # Check for value differences
-                differences = {}
-                has_differences = False
-                
-                for col in value_columns:
-                    if col in gstr2_record and col in books_record:
-                        gstr2_value = gstr2_record[col] if not pd.isna(gstr2_record[col]) else 0
-                        books_value = books_record[col] if not pd.isna(books_record[col]) else 0
-                        
-                        abs_diff = abs(gstr2_value - books_value)
-                        if abs_diff > self.amount_threshold:
-                            percent_diff = abs_diff / max(abs(gstr2_value), abs(books_value), 1) * 100 if max(abs(gstr2_value), abs(books_value)) > 0 else 0
-                            
-                            if percent_diff > self.percentage_threshold * 100:
-                                has_differences = True
-                                differences[col] = {
-                                    'gstr2': gstr2_value,
-                                    'books': books_value,
-                                    'difference': gstr2_value - books_value,
-                                    'percentage': percent_diff
-                                }
-                
-                if has_differences:
-                    mismatch = {
-                        'invoice_number': gstr2_record['Invoice Number'],
-                        'invoice_date': gstr2_record['Invoice Date'],
-                        'gstin': gstr2_record['GSTIN of Supplier'],
-                        'supplier_name': gstr2_record['Trade/Legal Name'] if 'Trade/Legal Name' in gstr2_record else '',
-                        'differences': differences,
-                        'gstr_type': gstr2_record['GSTR_Type'] if 'GSTR_Type' in gstr2_record else '2B'
-                    }
-                    mismatches.append(mismatch)
-                else:
-                    match = {
-                        'invoice_number': gstr2_record['Invoice Number'],
-                        'invoice_date': gstr2_record['Invoice Date'],
-                        'gstin': gstr2_record['GSTIN of Supplier'],
-                        'supplier_name': gstr2_record['Trade/Legal Name'] if 'Trade/Legal Name' in gstr2_record else '',
-                        'value': gstr2_record['Invoice Value'] if 'Invoice Value' in gstr2_record else None,
-                        'gstr_type': gstr2_record['GSTR_Type'] if 'GSTR_Type' in gstr2_record else '2B'
-                    }
-                    matches.append(match)
+            differs, percent_diff = amount_differences(gstr2_values, books_values,
+                                                       self.amount_threshold, self.percentage_threshold)
+            has_differences = differs.any(axis=1)
+            
+            # Records found in both sources
+            matches = invoice_frame(gstr2_common[~has_differences])
+            mismatch_rows = np.flatnonzero(has_differences)
             
             # Records only in GSTR-2A/2B
-            missing_in_books = []
-            for key in only_in_gstr2:
-                record = gstr2_df[gstr2_df['match_key'] == key].iloc[0]
-                missing = {
-                    'invoice_number': record['Invoice Number'],
-                    'invoice_date': record['Invoice Date'],
-                    'gstin': record['GSTIN of Supplier'],
-                    'supplier_name': record['Trade/Legal Name'] if 'Trade/Legal Name' in record else '',
-                    'value': record['Invoice Value'] if 'Invoice Value' in record else None,
-                    'gstr_type': record['GSTR_Type'] if 'GSTR_Type' in record else '2B'
-                }
-                missing_in_books.append(missing)
-                
+            missing_in_books = invoice_frame(gstr2_df.iloc[key_positions(key_status, 'left_only', 'left')])
+            
             # Records only in Books
-            missing_in_gstr2 = []
-            for key in only_in_books:
-                record = books_df[books_df['match_key'] == key].iloc[0]
-                missing = {
-                    'invoice_number': record['Invoice Number'],
-                    'invoice_date': record['Invoice Date'],
-                    'gstin': record['GSTIN of Supplier'],
-                    'supplier_name': record['Trade/Legal Name'] if 'Trade/Legal Name' in record else '',
-                    'value': record['Invoice Value'] if 'Invoice Value' in record else None
-                }
-                missing_in_gstr2.append(missing)
+            missing_in_gstr2 = invoice_frame(books_df.iloc[key_positions(key_status, 'right_only', 'right')],
+                                             with_type=False)
+            
+            if sink_dir is not None:
+                # Write every bucket straight from its columns; no per-record dicts
+                os.makedirs(sink_dir, exist_ok=True)
+                files = {name: os.path.join(sink_dir, f"{name}.parquet")
+                         for name in ['matches', 'mismatches', 'missing_in_books', 'missing_in_gstr2']}
+                matches.to_parquet(files['matches'], index=False)
+                difference_frame(
+                    invoice_frame(gstr2_common, with_value=False), compare_columns,
+                    gstr2_values, books_values, percent_diff, differs
+                ).to_parquet(files['mismatches'], index=False)
+                missing_in_books.to_parquet(files['missing_in_books'], index=False)
+                missing_in_gstr2.to_parquet(files['missing_in_gstr2'], index=False)
+            else:
+                matches = matches.to_dict('records')
+                missing_in_books = missing_in_books.to_dict('records')
+                missing_in_gstr2 = missing_in_gstr2.to_dict('records')
+                
+                # Only mismatched pairs need their differences spelled out
+                mismatches = invoice_records(gstr2_common.iloc[mismatch_rows], with_value=False)
+                for mismatch, i in zip(mismatches, mismatch_rows):
+                    mismatch['differences'] = {
+                        col: {
+                            'gstr2': gstr2_values[i, j],
+                            'books': books_values[i, j],
+                            'difference': gstr2_values[i, j] - books_values[i, j],
+                            'percentage': percent_diff[i, j]
+                        }
+                        for j, col in enumerate(compare_columns) if differs[i, j]
+                    }
             
             # Summary metrics
             total_gstr2_records = len(gstr2_df)
             total_books_records = len(books_df)
             match_count = len(matches)
-            mismatch_count = len(mismatches)
+            mismatch_count = len(mismatch_rows)
             missing_in_books_count = len(missing_in_books)
             missing_in_gstr2_count = len(missing_in_gstr2)
             
             # Tax summary
-            gstr2_tax_total = {
-                'taxable_value': gstr2_df['Taxable Value'].sum() if 'Taxable Value' in gstr2_df else 0,
-                'igst': gstr2_df['Integrated Tax'].sum() if 'Integrated Tax' in gstr2_df else 0,
-                'cgst': gstr2_df['Central Tax'].sum() if 'Central Tax' in gstr2_df else 0,
-                'sgst': gstr2_df['State/UT Tax'].sum() if 'State/UT Tax' in gstr2_df else 0,
-                'cess': gstr2_df['Cess'].sum() if 'Cess' in gstr2_df else 0
-            }
-            
-            books_tax_total = {
-                'taxable_value': books_df['Taxable Value'].sum() if 'Taxable Value' in books_df else 0,
-                'igst': books_df['Integrated Tax'].sum() if 'Integrated Tax' in books_df else 0,
-                'cgst': books_df['Central Tax'].sum() if 'Central Tax' in books_df else 0,
-                'sgst': books_df['State/UT Tax'].sum() if 'State/UT Tax' in books_df else 0,
-                'cess': books_df['Cess'].sum() if 'Cess' in books_df else 0
-            }
-            
-            tax_difference = {
-                'taxable_value': gstr2_tax_total['taxable_value'] - books_tax_total['taxable_value'],
-                'igst': gstr2_tax_total['igst'] - books_tax_total['igst'],
-                'cgst': gstr2_tax_total['cgst'] - books_tax_total['cgst'],
-                'sgst': gstr2_tax_total['sgst'] - books_tax_total['sgst'],
-                'cess': gstr2_tax_total['cess'] - books_tax_total['cess']
-            }
+            gstr2_tax_total = tax_totals(gstr2_df)
+            books_tax_total = tax_totals(books_df)
+            tax_difference = {key: gstr2_tax_total[key] - books_tax_total[key] for key in gstr2_tax_total}
             
             # Check ITC eligibility
             itc_status = {
@@ -270,16 +326,19 @@ class GSTR2BooksReconciliation:
             }
             
             if 'ITC Availability' in gstr2_df.columns:
+                # Only a handful of distinct availability texts; test each one once
+                # and look rows up by category code (-1, missing, picks the trailing False)
+                availability = gstr2_df['ITC Availability'].astype('category')
+                eligible = availability.cat.categories.astype(str).str.lower().str.contains('eligible')
+                is_eligible = np.append(eligible, False)[availability.cat.codes.to_numpy()]
                 itc_status['total_eligible_in_gstr2'] = gstr2_df.loc[
-                    gstr2_df['ITC Availability'].str.lower().str.contains('eligible', na=False), 
-                    ['Integrated Tax', 'Central Tax', 'State/UT Tax', 'Cess']
-                ].sum().sum()
+                    is_eligible, ITC_TAX_COLUMNS
+                ].to_numpy(dtype=np.float64, na_value=0.0).sum()
             
             if 'ITC Eligible' in books_df.columns:
                 itc_status['total_eligible_in_books'] = books_df.loc[
-                    books_df['ITC Eligible'] == True, 
-                    ['Integrated Tax', 'Central Tax', 'State/UT Tax', 'Cess']
-                ].sum().sum()
+                    books_df['ITC Eligible'] == True, ITC_TAX_COLUMNS
+                ].to_numpy(dtype=np.float64, na_value=0.0).sum()
             
             itc_status['difference'] = itc_status['total_eligible_in_gstr2'] - itc_status['total_eligible_in_books']
             
@@ -298,19 +357,25 @@ class GSTR2BooksReconciliation:
                     'books': books_tax_total,
                     'difference': tax_difference
                 },
-                'itc_status': itc_status,
-                'matches': matches,
-                'mismatches': mismatches,
-                'missing_in_books': missing_in_books,
-                'missing_in_gstr2': missing_in_gstr2
+                'itc_status': itc_status
             }
             
+            if sink_dir is not None:
+                results['files'] = files
+            else:
+                results.update({
+                    'matches': matches,
+                    'mismatches': mismatches,
+                    'missing_in_books': missing_in_books,
+                    'missing_in_gstr2': missing_in_gstr2
+                })
+            
             return results
             
         except Exception as e:
             raise Exception(f"Error during reconciliation: {str(e)}")
     
-    def process(self, gstr2_file, books_file, gstr_type="2B"):
+    def process(self, gstr2_file, books_file, gstr_type="2B", use_polars=False, sink_dir=None):
         """
         Process GSTR-2A/2B and Books data for reconciliation
         
@@ -318,17 +383,19 @@ class GSTR2BooksReconciliation:
             gstr2_file (str): Path to GSTR-2A/2B data file
             books_file (str): Path to Books (Purchase Register) data file
             gstr_type (str): Type of GSTR-2 file ('2A' or '2B')
+            use_polars (bool): Parse the Excel files with Polars when installed
+            sink_dir (str, optional): Write the invoice lists to Parquet files here
             
         Returns:
             dict: Reconciliation results
         """
         # Load data from files
-        gstr2_df, books_df = self.load_data(gstr2_file, books_file, gstr_type)
+        gstr2_df, books_df = self.load_data(gstr2_file, books_file, gstr_type, use_polars=use_polars)
         
         # Map columns based on defined mappings
         gstr2_mapped_df, books_mapped_df = self.map_columns(gstr2_df, books_df)
         
         # Perform reconciliation
-        results = self.reconcile(gstr2_mapped_df, books_mapped_df)
+        results = self.reconcile(gstr2_mapped_df, books_mapped_df, sink_dir=sink_dir)
         
         return results
\ No newline at end of file
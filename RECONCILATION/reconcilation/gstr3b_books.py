@@ -2,8 +2,8 @@
 Module to reconcile GSTR-3B data with books (output tax).
 """
 
-import pandas as pd
 import numpy as np
+from utils.data_processor import coerce_numeric, column_totals, compare_totals
 from config import GSTR3B_BOOKS_MAPPING, AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD
 
 def reconcile_gstr3b_books(gstr3b_data, books_data):
@@ -18,13 +18,10 @@ def reconcile_gstr3b_books(gstr3b_data, books_data):
         dict: Dictionary containing reconciliation results
     """
     # Ensure we're working with numeric data
-    for col in gstr3b_data.columns:
-        if col in ["Integrated Tax Amount", "Central Tax Amount", "State/UT Tax Amount", "Cess Amount"]:
-            gstr3b_data[col] = pd.to_numeric(gstr3b_data[col], errors='coerce').fillna(0)
-    
-    for col in books_data.columns:
-        if col in ["IGST Output", "CGST Output", "SGST/UTGST Output", "Cess Output"]:
-            books_data[col] = pd.to_numeric(books_data[col], errors='coerce').fillna(0)
+    coerce_numeric(gstr3b_data, [col for col in gstr3b_data.columns if col in
+                                 ["Integrated Tax Amount", "Central Tax Amount", "State/UT Tax Amount", "Cess Amount"]])
+    coerce_numeric(books_data, [col for col in books_data.columns if col in
+                                ["IGST Output", "CGST Output", "SGST/UTGST Output", "Cess Output"]])
     
     # Prepare results dictionary
     results = {
@@ -46,34 +43,26 @@ def reconcile_gstr3b_books(gstr3b_data, books_data):
         "Cess Amount": "Cess Output"
     }
     
+    # Total every tax type in one reduction per source; absent columns count as 0
+    gstr3b_totals = column_totals(gstr3b_data, list(tax_mapping.keys()))
+    books_totals = column_totals(books_data, list(tax_mapping.values()))
+    tax_diff, tax_diff_percent, tax_flagged = compare_totals(gstr3b_totals, books_totals, AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD)
+    
     # Compare total tax amounts for each tax type
-    for gstr3b_col, books_col in tax_mapping.items():
-        gstr3b_total = gstr3b_data[gstr3b_col].sum() if gstr3b_col in gstr3b_data.columns else 0
-        books_total = books_data[books_col].sum() if books_col in books_data.columns else 0
-        
-        diff = gstr3b_total - books_total
-        diff_percent = (diff / books_total * 100) if books_total != 0 else np.inf
-        
+    for i, gstr3b_col in enumerate(tax_mapping.keys()):
         comparison = {
             "tax_type": gstr3b_col.replace(" Amount", ""),
-            "gstr3b_value": float(gstr3b_total),
-            "books_value": float(books_total),
-            "difference": float(diff),
-            "difference_percent": float(diff_percent)
+            "gstr3b_value": float(gstr3b_totals[i]),
+            "books_value": float(books_totals[i]),
+            "difference": float(tax_diff[i]),
+            "difference_percent": float(tax_diff_percent[i])
         }
         
         results["summary_comparison"].append(comparison)
         
         # Record as discrepancy if beyond threshold
-        if abs(diff) > AMOUNT_THRESHOLD and abs(diff_percent) > PERCENTAGE_THRESHOLD:
-            results["discrepancies"].append({
-                "type": "Tax Amount Mismatch",
-                "tax_type": gstr3b_col.replace(" Amount", ""),
-                "gstr3b_value": float(gstr3b_total),
-                "books_value": float(books_total),
-                "difference": float(diff),
-                "difference_percent": float(diff_percent)
-            })
+        if tax_flagged[i]:
+            results["discrepancies"].append({"type": "Tax Amount Mismatch", **comparison})
     
     # Compare tax categories (Table 3.1 sections)
     category_mapping = {
@@ -84,58 +73,39 @@ def reconcile_gstr3b_books(gstr3b_data, books_data):
         "Table 3.1(e)": "Non-GST Supplies"
     }
     
-    # Extract category data if available
+    # Extract category values - this will depend on how data is structured
+    # Simplified example assuming values are in columns with category names
+    gstr3b_values = column_totals(gstr3b_data, list(category_mapping.keys()))
+    books_values = column_totals(books_data, list(category_mapping.values()))
+    category_diff, category_diff_percent, category_flagged = compare_totals(gstr3b_values, books_values, AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD)
+    
     category_data = []
     
-    for gstr3b_category, books_category in category_mapping.items():
-        gstr3b_value = 0
-        books_value = 0
-        
-        # Extract category values - this will depend on how data is structured
-        # Simplified example assuming values are in columns with category names
-        if gstr3b_category in gstr3b_data.columns:
-            gstr3b_value = gstr3b_data[gstr3b_category].sum()
-        
-        if books_category in books_data.columns:
-            books_value = books_data[books_category].sum()
-        
-        diff = gstr3b_value - books_value
-        diff_percent = (diff / books_value * 100) if books_value != 0 else np.inf
-        
+    for i, (gstr3b_category, books_category) in enumerate(category_mapping.items()):
         comparison = {
             "category": gstr3b_category,
             "books_category": books_category,
-            "gstr3b_value": float(gstr3b_value),
-            "books_value": float(books_value),
-            "difference": float(diff),
-            "difference_percent": float(diff_percent)
+            "gstr3b_value": float(gstr3b_values[i]),
+            "books_value": float(books_values[i]),
+            "difference": float(category_diff[i]),
+            "difference_percent": float(category_diff_percent[i])
         }
         
         category_data.append(comparison)
         
         # Record as discrepancy if beyond threshold
-        if abs(diff) > AMOUNT_THRESHOLD and abs(diff_percent) > PERCENTAGE_THRESHOLD:
-            results["discrepancies"].append({
-                "type": "Category Mismatch",
-                "category": gstr3b_category,
-                "books_category": books_category,
-                "gstr3b_value": float(gstr3b_value),
-                "books_value": float(books_value),
-                "difference": float(diff),
-                "difference_percent": float(diff_percent)
-            })
+        if category_flagged[i]:
+            results["discrepancies"].append({"type": "Category Mismatch", **comparison})
     
     results["tax_category_comparison"] = category_data
     
-    # Calculate summary statistics
+    # Calculate summary statistics straight from the flagged differences
+    flagged_diff = np.concatenate([tax_diff[tax_flagged], category_diff[category_flagged]])
+    flagged_percent = np.concatenate([tax_diff_percent[tax_flagged], category_diff_percent[category_flagged]])
     results["summary"]["total_discrepancies"] = len(results["discrepancies"])
     
-    if results["discrepancies"]:
-        results["summary"]["max_discrepancy_percentage"] = max(
-            abs(d["difference_percent"]) for d in results["discrepancies"]
-        )
-        results["summary"]["total_discrepancy_amount"] = sum(
-            abs(d["difference"]) for d in results["discrepancies"]
-        )
+    if len(flagged_diff):
+        results["summary"]["max_discrepancy_percentage"] = float(np.abs(flagged_percent).max())
+        results["summary"]["total_discrepancy_amount"] = float(np.abs(flagged_diff).sum())
     
-    return results
\ No newline at end of file
+    return results
@@ -9,18 +9,60 @@ It compares the outward supplies reported in GSTR-3B with the corresponding sect
 """
 
 import os
+import re
+import functools
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import logging
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name
 
-from utils.excel_handler import read_excel_file, write_excel_file
+from utils.excel_handler import read_excel_file, write_excel_file, get_sheet_names
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Column width allowed for numeric values in the report
+NUMERIC_COLUMN_WIDTH = 18
+
+@functools.lru_cache(maxsize=8)
+def _read_return_file(file_path, modified_ns, use_polars, table_sheets):
+    """
+    Read a return workbook once per file version; repeat reconciliations on an
+    unchanged file reuse the parsed data. modified_ns only keys the cache.
+    """
+    # A workbook with a sheet per table only needs the sheets that are mapped
+    if table_sheets:
+        wanted = [sheet for sheet in get_sheet_names(file_path) if sheet in table_sheets]
+        if wanted:
+            return read_excel_file(file_path, sheet_name=wanted, dtype_backend='pyarrow')
+    return read_excel_file(file_path, use_polars=use_polars, dtype_backend='pyarrow')
+
+def read_return_file(file_path, use_polars=False, table_sheets=None):
+    """
+    Read a GSTR return workbook into Arrow-backed columns, cached by path and modification time.
+    
+    Args:
+        file_path (str): Path to the Excel file
+        use_polars (bool): Parse the Excel file with Polars when installed
+        table_sheets (iterable, optional): Table names that may be sheets of the
+                                           workbook; when any are, only those sheets are read
+        
+    Returns:
+        pandas.DataFrame or dict of DataFrames: Data from the Excel file
+    """
+    table_sheets = frozenset(table_sheets) if table_sheets else None
+    data = _read_return_file(os.path.abspath(file_path), os.stat(file_path).st_mtime_ns, use_polars, table_sheets)
+    
+    # Shallow copies keep the cached frames untouched: with copy-on-write,
+    # changes made by the caller copy the data first
+    if isinstance(data, dict):
+        return {sheet: df.copy(deep=False) for sheet, df in data.items()}
+    return data.copy(deep=False)
+
 def clean_dataframe(df):
     # Placeholder function for cleaning dataframe; implement as needed
     return df
@@ -34,7 +76,7 @@ class GSTR3BGSTR1Reconciliation:
     Class to handle reconciliation between GSTR-3B and GSTR-1 returns.
     """
     
-    def __init__(self, gstr3b_file=None, gstr1_file=None, output_dir=None):
+    def __init__(self, gstr3b_file=None, gstr1_file=None, output_dir=None, use_polars=False, force_report=False):
         """
         Initialize reconciliation with file paths.
         
@@ -42,12 +84,16 @@ class GSTR3BGSTR1Reconciliation:
             gstr3b_file (str): Path to GSTR-3B Excel file
             gstr1_file (str): Path to GSTR-1 Excel file
             output_dir (str): Directory to save output files
+            use_polars (bool): Parse the Excel files with Polars when installed
+            force_report (bool): Write the report even when the returns reconcile
         """
         from config import DEFAULT_OUTPUT_DIR, GSTR3B_GSTR1_MAPPING, AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD
         
         self.gstr3b_file = gstr3b_file
         self.gstr1_file = gstr1_file
         self.output_dir = output_dir or DEFAULT_OUTPUT_DIR
+        self.use_polars = use_polars
+        self.force_report = force_report
         self.mapping = GSTR3B_GSTR1_MAPPING
         self.amount_threshold = AMOUNT_THRESHOLD
         self.percentage_threshold = PERCENTAGE_THRESHOLD
@@ -57,6 +103,7 @@ class GSTR3BGSTR1Reconciliation:
         self.gstr1_data = None
         self.summary_data = None
         self.detailed_comparison = None
+        self._lookups = {}
         
         # Ensure output directory exists
         os.makedirs(self.output_dir, exist_ok=True)
@@ -69,11 +116,16 @@ class GSTR3BGSTR1Reconciliation:
             raise ValueError("Both GSTR-3B and GSTR-1 file paths must be provided.")
             
         try:
+            # Read straight into Arrow-backed columns so the many column sums
+            # below run on Arrow compute kernels. Amounts stay float64: float32
+            # cannot hold paise exactly above about Rs 1.67 lakh, and int64 paise
+            # would be the same 8 bytes per value
             logger.info(f"Reading GSTR-3B data from {self.gstr3b_file}")
-            self.gstr3b_data = read_excel_file(self.gstr3b_file)
+            self.gstr3b_data = read_return_file(self.gstr3b_file, use_polars=self.use_polars)
             
             logger.info(f"Reading GSTR-1 data from {self.gstr1_file}")
-            self.gstr1_data = read_excel_file(self.gstr1_file)
+            table_sheets = {table for tables in self.mapping.values() for table in tables}
+            self.gstr1_data = read_return_file(self.gstr1_file, use_polars=self.use_polars, table_sheets=table_sheets)
             
             # Clean and standardize data
             self.gstr3b_data = clean_dataframe(self.gstr3b_data)
@@ -83,6 +135,9 @@ class GSTR3BGSTR1Reconciliation:
             self.gstr3b_data = format_date_columns(self.gstr3b_data)
             self.gstr1_data = format_date_columns(self.gstr1_data)
             
+            # Lookups built on the previous data no longer apply
+            self._lookups = {}
+            
             logger.info("Data loaded successfully")
             return True
             
@@ -97,50 +152,95 @@ class GSTR3BGSTR1Reconciliation:
         Returns:
             dict: Dictionary with GSTR-3B table values
         """
-        gstr3b_values = {
-            "Table 3.1(a)": self._extract_value_from_gstr3b("Table 3.1(a)"),
-            "Table 3.1(b)": self._extract_value_from_gstr3b("Table 3.1(b)"),
-            "Table 3.1(c)": self._extract_value_from_gstr3b("Table 3.1(c)"),
-            "Table 3.1(d)": self._extract_value_from_gstr3b("Table 3.1(d)"),
-            "Table 3.1(e)": self._extract_value_from_gstr3b("Table 3.1(e)"),
-            "Table 3.2": self._extract_value_from_gstr3b("Table 3.2")
-        }
+        # Table values followed by the tax amount fields
+        fields = ["Table 3.1(a)", "Table 3.1(b)", "Table 3.1(c)", "Table 3.1(d)", "Table 3.1(e)", "Table 3.2",
+                  "Integrated Tax Amount", "Central Tax Amount", "State/UT Tax Amount", "Cess Amount"]
+        raw_values = {}
+        
+        try:
+            # This implementation depends on the actual structure of the GSTR-3B data
+            # For demonstration, we assume a structure where each field name is in one column
+            # and its value in another; the first row of every field is read in one lookup
+            remaining = fields
+            if 'Field' in self.gstr3b_data.columns and 'Value' in self.gstr3b_data.columns:
+                positions = self._positions_by_value('gstr3b', 'Field')
+                found = [field for field in fields if field in positions]
+                values = self.gstr3b_data['Value'].iloc[[positions[field][0] for field in found]]
+                raw_values.update(zip(found, values))
+                remaining = [field for field in fields if field not in positions]
+            
+            # Alternative approach if the above doesn't match the data structure:
+            # fields that are columns are totalled in one call
+            summed = [field for field in remaining if field in self.gstr3b_data.columns]
+            raw_values.update(self._column_sums('gstr3b', summed))
+        except Exception as e:
+            logger.warning(f"Error extracting values from GSTR-3B: {str(e)}")
+            raw_values = {}
         
-        # Add tax amount fields
-        tax_fields = ["Integrated Tax Amount", "Central Tax Amount", "State/UT Tax Amount", "Cess Amount"]
-        for field in tax_fields:
-            gstr3b_values[field] = self._extract_value_from_gstr3b(field)
+        gstr3b_values = {}
+        for field in fields:
+            value = raw_values.get(field, 0.0)
+            try:
+                # Arrow-backed columns give pd.NA for blanks, which float() rejects
+                gstr3b_values[field] = np.nan if pd.isna(value) else float(value)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Error extracting {field} from GSTR-3B: {str(e)}")
+                gstr3b_values[field] = 0.0
             
         return gstr3b_values
         
-    def _extract_value_from_gstr3b(self, field_name):
+    def _positions_by_value(self, source, column):
         """
-        Helper method to extract values from GSTR-3B dataframe.
+        Row positions of every distinct value in a column, found in one pass per load.
         
         Args:
-            field_name (str): Field name to extract
+            source (str): 'gstr3b' or 'gstr1'
+            column (str): Column whose values are looked up, e.g. 'Field' or 'Section'
             
         Returns:
-            float: Extracted value or 0.0 if not found
+            dict: Row positions (numpy arrays, in row order) keyed by column value
         """
-        try:
-            # This implementation depends on the actual structure of the GSTR-3B data
-            # For demonstration, we assume a structure where field_name is in one column
-            # and its value in another
-            if 'Field' in self.gstr3b_data.columns and 'Value' in self.gstr3b_data.columns:
-                matched_row = self.gstr3b_data[self.gstr3b_data['Field'] == field_name]
-                if not matched_row.empty:
-                    return float(matched_row['Value'].iloc[0])
+        key = (source, column)
+        if key not in self._lookups:
+            data = getattr(self, f"{source}_data")
+            self._lookups[key] = data.groupby(column, sort=False).indices
+        return self._lookups[key]
+        
+    def _column_sums(self, source, columns):
+        """
+        Totals of several columns, summed together once per load.
+        
+        Args:
+            source (str): 'gstr3b' or 'gstr1'
+            columns (list): Columns to total
             
-            # Alternative approach if the above doesn't match the data structure
-            if field_name in self.gstr3b_data.columns:
-                return float(self.gstr3b_data[field_name].sum())
-                
-            return 0.0
-        except Exception as e:
-            logger.warning(f"Error extracting {field_name} from GSTR-3B: {str(e)}")
-            return 0.0
+        Returns:
+            dict: Totals keyed by column name
+        """
+        key = (source, tuple(columns))
+        if key not in self._lookups:
+            data = getattr(self, f"{source}_data")
+            self._lookups[key] = data[list(columns)].sum().to_dict()
+        return self._lookups[key]
+        
+    def _sums_by_value(self, source, column, value_column):
+        """
+        Totals of a value column for every distinct value in a column, grouped in one pass per load.
+        
+        Args:
+            source (str): 'gstr3b' or 'gstr1'
+            column (str): Column whose values are looked up, e.g. 'Section'
+            value_column (str): Column to total, e.g. 'Taxable Value'
             
+        Returns:
+            dict: Totals keyed by column value
+        """
+        key = (source, column, value_column)
+        if key not in self._lookups:
+            data = getattr(self, f"{source}_data")
+            self._lookups[key] = data.groupby(column, sort=False)[value_column].sum().to_dict()
+        return self._lookups[key]
+        
     def extract_gstr1_table_values(self):
         """
         Extract values from GSTR-1 sections for comparison.
@@ -148,21 +248,12 @@ class GSTR3BGSTR1Reconciliation:
         Returns:
             dict: Dictionary with GSTR-1 table values
         """
-        gstr1_values = {}
-        
-        # Process each mapping to aggregate values from GSTR-1
-        for gstr3b_table, gstr1_tables in self.mapping.items():
-            if not gstr1_tables:  # Skip if no mapping exists
-                continue
-                
-            total_value = 0.0
-            for gstr1_table in gstr1_tables:
-                value = self._extract_value_from_gstr1(gstr1_table)
-                total_value += value
-                
-            gstr1_values[gstr3b_table] = total_value
-            
-        return gstr1_values
+        # Aggregate values from GSTR-1 for each mapping, skipping tables with no mapping
+        return {
+            gstr3b_table: sum((self._extract_value_from_gstr1(gstr1_table) for gstr1_table in gstr1_tables), 0.0)
+            for gstr3b_table, gstr1_tables in self.mapping.items()
+            if gstr1_tables
+        }
     
     def _extract_value_from_gstr1(self, table_name):
         """
@@ -188,9 +279,9 @@ class GSTR3BGSTR1Reconciliation:
                     
             # Case 2: If table_name is a column indicating the section
             if 'Section' in self.gstr1_data.columns and 'Taxable Value' in self.gstr1_data.columns:
-                matched_rows = self.gstr1_data[self.gstr1_data['Section'] == table_name]
-                if not matched_rows.empty:
-                    return float(matched_rows['Taxable Value'].sum())
+                section_sums = self._sums_by_value('gstr1', 'Section', 'Taxable Value')
+                if table_name in section_sums:
+                    return float(section_sums[table_name])
                     
             # Case 3: If there's a column with the specific table name
             if table_name in self.gstr1_data.columns:
@@ -198,9 +289,12 @@ class GSTR3BGSTR1Reconciliation:
                 
             # If it's a description like "Nil rated, exempted supplies"
             if 'Description' in self.gstr1_data.columns and 'Value' in self.gstr1_data.columns:
-                matched_rows = self.gstr1_data[self.gstr1_data['Description'].str.contains(table_name, na=False)]
-                if not matched_rows.empty:
-                    return float(matched_rows['Value'].sum())
+                # Search each distinct description once rather than every row
+                pattern = re.compile(table_name)
+                matched = [positions for description, positions in self._positions_by_value('gstr1', 'Description').items()
+                           if isinstance(description, str) and pattern.search(description)]
+                if matched:
+                    return float(self.gstr1_data['Value'].iloc[np.sort(np.concatenate(matched))].sum())
                     
             return 0.0
         except Exception as e:
@@ -217,8 +311,6 @@ class GSTR3BGSTR1Reconciliation:
         gstr3b_values = self.extract_gstr3b_table_values()
         gstr1_values = self.extract_gstr1_table_values()
         
-        comparison_data = []
-        
         # Prepare the mapping for comparison
         comparison_mapping = {
             "Table 3.1(a)": "Table 3.1(a) - Taxable supplies",
@@ -229,38 +321,30 @@ class GSTR3BGSTR1Reconciliation:
             "Table 3.2": "Table 3.2 - Tax rates"
         }
         
-        # Compare each table/section
-        for gstr3b_key, description in comparison_mapping.items():
-            gstr3b_value = gstr3b_values.get(gstr3b_key, 0.0)
-            gstr1_value = gstr1_values.get(gstr3b_key, 0.0)
-            
-            # Calculate difference
-            diff = gstr3b_value - gstr1_value
-            
-            # Calculate percentage difference to avoid division by zero
-            if gstr3b_value != 0 or gstr1_value != 0:
-                base_value = max(abs(gstr3b_value), abs(gstr1_value))
-                percentage_diff = (diff / base_value) * 100 if base_value > 0 else 0.0
-            else:
-                percentage_diff = 0.0
-                
-            # Check if the difference is significant based on thresholds
-            is_significant = (abs(diff) > self.amount_threshold and 
-                             abs(percentage_diff) > (self.percentage_threshold * 100))
-            
-            comparison_data.append({
-                "GSTR-3B Table/Field": gstr3b_key,
-                "Description": description,
-                "GSTR-3B Value": gstr3b_value,
-                "GSTR-1 Value": gstr1_value,
-                "Difference": diff,
-                "% Difference": percentage_diff,
-                "Is Significant": is_significant,
-                "Remarks": "Discrepancy needs attention" if is_significant else "Within acceptable limits"
-            })
-        
-        # Create a DataFrame from the comparison data
-        self.detailed_comparison = pd.DataFrame(comparison_data)
+        # Compare every table/section at once
+        gstr3b_array = np.array([gstr3b_values.get(key, 0.0) for key in comparison_mapping], dtype=np.float64)
+        gstr1_array = np.array([gstr1_values.get(key, 0.0) for key in comparison_mapping], dtype=np.float64)
+        diff = gstr3b_array - gstr1_array
+        
+        # Percentage of the larger side; 0 where both sides are 0
+        base_value = np.maximum(np.abs(gstr3b_array), np.abs(gstr1_array))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percentage_diff = np.where(base_value > 0, diff / base_value * 100, 0.0)
+        
+        # Check if the difference is significant based on thresholds
+        is_significant = ((np.abs(diff) > self.amount_threshold) &
+                          (np.abs(percentage_diff) > (self.percentage_threshold * 100)))
+        
+        self.detailed_comparison = pd.DataFrame({
+            "GSTR-3B Table/Field": list(comparison_mapping.keys()),
+            "Description": list(comparison_mapping.values()),
+            "GSTR-3B Value": gstr3b_array,
+            "GSTR-1 Value": gstr1_array,
+            "Difference": diff,
+            "% Difference": percentage_diff,
+            "Is Significant": is_significant,
+            "Remarks": np.where(is_significant, "Discrepancy needs attention", "Within acceptable limits")
+        })
         
         # Create a summary
         self.create_summary()
@@ -322,43 +406,10 @@ class GSTR3BGSTR1Reconciliation:
         report_path = os.path.join(self.output_dir, report_name)
         
         try:
-            # Create a writer object
-            with pd.ExcelWriter(report_path, engine='xlsxwriter') as writer:
-                # Write summary to the first sheet
-                if self.summary_data is not None:
-                    self.summary_data.to_excel(writer, sheet_name="Summary", index=False)
-                    
-                    # Format the summary sheet
-                    workbook = writer.book
-                    summary_sheet = writer.sheets["Summary"]
-                    
-                    # Add formats
-                    header_format = workbook.add_format({
-                        'bold': True, 
-                        'text_wrap': True, 
-                        'valign': 'top',
-                        'fg_color': '#D7E4BC', 
-                        'border': 1
-                    })
-                    
-                    # Apply formats to the header row
-                    for col_num, value in enumerate(self.summary_data.columns.values):
-                        summary_sheet.write(0, col_num, value, header_format)
-                    
-                    # Adjust column widths
-                    for i, col in enumerate(self.summary_data.columns):
-                        max_len = max(
-                            self.summary_data[col].astype(str).map(len).max(),
-                            len(str(col))
-                        ) + 2
-                        summary_sheet.set_column(i, i, max_len)
-                
-                # Write detailed comparison to the second sheet
-                self.detailed_comparison.to_excel(writer, sheet_name="Detailed Comparison", index=False)
-                
-                # Format the detailed comparison sheet
-                detailed_sheet = writer.sheets["Detailed Comparison"]
-                
+            # Write the workbook directly, streaming rows to disk and sharing one
+            # format object per style instead of going through pd.ExcelWriter
+            workbook = xlsxwriter.Workbook(report_path, {'constant_memory': True, 'use_zip64': True})
+            try:
                 # Add formats
                 header_format = workbook.add_format({
                     'bold': True, 
@@ -373,22 +424,26 @@ class GSTR3BGSTR1Reconciliation:
                     'font_color': '#9C0006'
                 })
                 
-                # Apply formats to the header row
-                for col_num, value in enumerate(self.detailed_comparison.columns.values):
-                    detailed_sheet.write(0, col_num, value, header_format)
+                # Write summary to the first sheet
+                if self.summary_data is not None:
+                    self._write_sheet(workbook, "Summary", self.summary_data, header_format)
                 
-                # Highlight significant discrepancies
-                for row_num in range(1, len(self.detailed_comparison) + 1):
-                    if self.detailed_comparison.iloc[row_num-1]["Is Significant"]:
-                        detailed_sheet.set_row(row_num, None, significant_format)
+                # Write detailed comparison to the second sheet
+                detailed_sheet = self._write_sheet(workbook, "Detailed Comparison", self.detailed_comparison,
+                                                   header_format)
                 
-                # Adjust column widths
-                for i, col in enumerate(self.detailed_comparison.columns):
-                    max_len = max(
-                        self.detailed_comparison[col].astype(str).map(len).max(),
-                        len(str(col))
-                    ) + 2
-                    detailed_sheet.set_column(i, i, max_len)
+                # Highlight significant discrepancies with one conditional format rule
+                # on the "Is Significant" column rather than a format per row
+                last_row = len(self.detailed_comparison)
+                last_col = len(self.detailed_comparison.columns) - 1
+                flag_col = xl_col_to_name(self.detailed_comparison.columns.get_loc("Is Significant"))
+                detailed_sheet.conditional_format(1, 0, last_row, last_col, {
+                    'type': 'formula',
+                    'criteria': f'=${flag_col}2=TRUE',
+                    'format': significant_format
+                })
+            finally:
+                workbook.close()
             
             logger.info(f"Report generated successfully at {report_path}")
             return report_path
@@ -397,12 +452,50 @@ class GSTR3BGSTR1Reconciliation:
             logger.error(f"Error generating report: {str(e)}")
             return None
     
+    @staticmethod
+    def _write_sheet(workbook, sheet_name, df, header_format):
+        """
+        Write a DataFrame to a new worksheet row by row.
+        
+        Args:
+            workbook (xlsxwriter.Workbook): Workbook to add the sheet to
+            sheet_name (str): Name of the worksheet
+            df (pandas.DataFrame): Data to write, with its columns as the header row
+            header_format (xlsxwriter.format.Format): Format for the header row
+            
+        Returns:
+            xlsxwriter.worksheet.Worksheet: The new worksheet
+        """
+        sheet = workbook.add_worksheet(sheet_name)
+        
+        # Adjust column widths: numbers and flags have a bounded printed width,
+        # all text columns are measured together in one vectorized pass
+        is_bool = np.array([pd.api.types.is_bool_dtype(dtype) for dtype in df.dtypes], dtype=bool)
+        is_numeric = np.array([pd.api.types.is_numeric_dtype(dtype) for dtype in df.dtypes], dtype=bool)
+        value_lens = np.where(is_bool, len("False"), np.where(is_numeric, NUMERIC_COLUMN_WIDTH, 0))
+        text_positions = np.flatnonzero(~is_numeric)
+        if len(df) and len(text_positions):
+            text_values = df.iloc[:, text_positions].to_numpy(dtype=str)
+            value_lens[text_positions] = np.char.str_len(text_values).max(axis=0)
+        header_lens = np.fromiter((len(str(col)) for col in df.columns), dtype=np.int64, count=len(df.columns))
+        for i, width in enumerate(np.maximum(value_lens, header_lens) + 2):
+            sheet.set_column(i, i, int(width))
+        
+        sheet.write_row(0, 0, [str(col) for col in df.columns], header_format)
+        
+        # Blank missing values as pd.ExcelWriter does
+        for row_num, row_values in enumerate(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None), start=1):
+            sheet.write_row(row_num, 0, row_values)
+        
+        return sheet
+    
     def reconcile(self):
         """
         Execute the full reconciliation process.
         
         Returns:
-            tuple: (success status, path to report if successful)
+            tuple: (success status, path to report if successful; None when the
+                   returns reconcile and no report was forced)
         """
         try:
             # Load data
@@ -412,6 +505,11 @@ class GSTR3BGSTR1Reconciliation:
             # Compare returns
             self.compare_returns()
             
+            # Skip the report for a clean period unless one was asked for
+            if self.summary_data.iloc[0]["Number of Significant Discrepancies"] == 0 and not self.force_report:
+                logger.info("No significant discrepancies; report not generated")
+                return True, None
+            
             # Generate report
             report_path = self.generate_report()
             
@@ -425,7 +523,7 @@ class GSTR3BGSTR1Reconciliation:
             return False, str(e)
 
 
-def run_reconciliation(gstr3b_file, gstr1_file, output_dir=None):
+def run_reconciliation(gstr3b_file, gstr1_file, output_dir=None, use_polars=False, force_report=False):
     """
     Run the GSTR-3B vs GSTR-1 reconciliation process.
     
@@ -433,11 +531,13 @@ def run_reconciliation(gstr3b_file, gstr1_file, output_dir=None):
         gstr3b_file (str): Path to GSTR-3B file
         gstr1_file (str): Path to GSTR-1 file
         output_dir (str, optional): Output directory for reports
+        use_polars (bool, optional): Parse the Excel files with Polars when installed
+        force_report (bool, optional): Write the report even when the returns reconcile
         
     Returns:
-        tuple: (success status, message or report path)
+        tuple: (success status, message or report path; None when no report was needed)
     """
-    reconciler = GSTR3BGSTR1Reconciliation(gstr3b_file, gstr1_file, output_dir)
+    reconciler = GSTR3BGSTR1Reconciliation(gstr3b_file, gstr1_file, output_dir, use_polars, force_report)
     return reconciler.reconcile()
 
 
@@ -449,12 +549,17 @@ if __name__ == "__main__":
     parser.add_argument("--gstr3b", required=True, help="Path to GSTR-3B Excel file")
     parser.add_argument("--gstr1", required=True, help="Path to GSTR-1 Excel file")
     parser.add_argument("--output", help="Directory to save output files")
+    parser.add_argument("--polars", action="store_true", help="Parse the Excel files with Polars")
+    parser.add_argument("--force-report", action="store_true",
+                        help="Write the report even when there are no significant discrepancies")
     
     args = parser.parse_args()
     
-    success, result = run_reconciliation(args.gstr3b, args.gstr1, args.output)
+    success, result = run_reconciliation(args.gstr3b, args.gstr1, args.output, args.polars, args.force_report)
     
-    if success:
+    if success and result is None:
+        print("Reconciliation completed successfully. No significant discrepancies, so no report was written.")
+    elif success:
         print(f"Reconciliation completed successfully. Report saved at: {result}")
     else:
         print(f"Reconciliation failed: {result}")
\ No newline at end of file
@@ -3,9 +3,12 @@ Module to reconcile ITC in Books vs Eligible ITC (Section 16 & 17).
 """
 
 import pandas as pd
-import numpy as np
+from utils.data_processor import coerce_numeric, column_totals, compare_totals
 from config import ITC_BOOKS_ELIGIBILITY_MAPPING, AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD
 
+# Books and eligibility columns holding ITC amounts, for constant-time membership checks
+ITC_COLUMNS = frozenset(ITC_BOOKS_ELIGIBILITY_MAPPING) | frozenset(ITC_BOOKS_ELIGIBILITY_MAPPING.values())
+
 def reconcile_itc_eligibility(books_data, eligibility_data):
     """
     Reconciles ITC in Books with Eligible ITC as per Section 16 & 17 to identify discrepancies.
@@ -19,9 +22,7 @@ def reconcile_itc_eligibility(books_data, eligibility_data):
     """
     # Ensure we're working with numeric data
     for df in [books_data, eligibility_data]:
-        for col in df.columns:
-            if col in ITC_BOOKS_ELIGIBILITY_MAPPING.keys() or col in ITC_BOOKS_ELIGIBILITY_MAPPING.values():
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        coerce_numeric(df, [col for col in df.columns if col in ITC_COLUMNS])
     
     # Prepare results dictionary
     results = {
@@ -36,49 +37,38 @@ def reconcile_itc_eligibility(books_data, eligibility_data):
         }
     }
     
+    # Total every mapped column in one reduction per source; absent columns count as 0
+    books_totals = column_totals(books_data, list(ITC_BOOKS_ELIGIBILITY_MAPPING.keys()))
+    eligibility_totals = column_totals(eligibility_data, list(ITC_BOOKS_ELIGIBILITY_MAPPING.values()))
+    diff, diff_percent, flagged = compare_totals(books_totals, eligibility_totals, AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD)
+    
     # Map books columns to eligibility fields
-    for books_col, eligibility_field in ITC_BOOKS_ELIGIBILITY_MAPPING.items():
-        books_value = books_data[books_col].sum() if books_col in books_data.columns else 0
-        eligibility_value = eligibility_data[eligibility_field].sum() if eligibility_field in eligibility_data.columns else 0
-        
-        diff = books_value - eligibility_value
-        diff_percent = (diff / eligibility_value * 100) if eligibility_value != 0 else np.inf
-        
-        comparison = {
-            "itc_type": books_col,
-            "eligibility_field": eligibility_field,
-            "books_value": float(books_value),
-            "eligibility_value": float(eligibility_value),
-            "difference": float(diff),
-            "difference_percent": float(diff_percent)
-        }
-        
-        results["itc_comparison"].append(comparison)
-        
-        # Record as discrepancy if beyond threshold
-        if abs(diff) > AMOUNT_THRESHOLD and abs(diff_percent) > PERCENTAGE_THRESHOLD:
-            results["discrepancies"].append({
-                "type": "ITC Mismatch",
-                "itc_type": books_col,
-                "eligibility_field": eligibility_field,
-                "books_value": float(books_value),
-                "eligibility_value": float(eligibility_value),
-                "difference": float(diff),
-                "difference_percent": float(diff_percent)
-            })
+    comparison = pd.DataFrame({
+        "itc_type": list(ITC_BOOKS_ELIGIBILITY_MAPPING.keys()),
+        "eligibility_field": list(ITC_BOOKS_ELIGIBILITY_MAPPING.values()),
+        "books_value": books_totals,
+        "eligibility_value": eligibility_totals,
+        "difference": diff,
+        "difference_percent": diff_percent
+    })
+    results["itc_comparison"] = comparison.to_dict("records")
+    
+    # Record as discrepancy if beyond threshold
+    discrepancies = comparison[flagged]
+    discrepancies.insert(0, "type", "ITC Mismatch")
+    results["discrepancies"] = discrepancies.to_dict("records")
     
     # Calculate Net ITC comparison
     if "Net ITC" in books_data.columns and "Net Eligible ITC" in eligibility_data.columns:
         net_books_itc = books_data["Net ITC"].sum()
         net_eligible_itc = eligibility_data["Net Eligible ITC"].sum()
         
-        net_diff = net_books_itc - net_eligible_itc
-        net_diff_percent = (net_diff / net_eligible_itc * 100) if net_eligible_itc != 0 else np.inf
+        net_diff, net_diff_percent, _ = compare_totals([net_books_itc], [net_eligible_itc], AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD)
         
         results["summary"]["total_books_itc"] = float(net_books_itc)
         results["summary"]["total_eligible_itc"] = float(net_eligible_itc)
-        results["summary"]["difference"] = float(net_diff)
-        results["summary"]["difference_percent"] = float(net_diff_percent)
+        results["summary"]["difference"] = float(net_diff[0])
+        results["summary"]["difference_percent"] = float(net_diff_percent[0])
     
     # Calculate summary statistics
     results["summary"]["total_discrepancies"] = len(results["discrepancies"])
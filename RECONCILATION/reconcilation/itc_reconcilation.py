@@ -3,7 +3,7 @@ Module to reconcile ITC in GSTR-3B vs GSTR-2B.
 """
 
 import pandas as pd
-import numpy as np
+from utils.data_processor import coerce_numeric, column_totals, compare_totals
 from config import ITC_GSTR3B_GSTR2B_MAPPING, AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD
 
 def reconcile_itc_gstr3b_gstr2b(gstr3b_data, gstr2b_data):
@@ -19,9 +19,7 @@ def reconcile_itc_gstr3b_gstr2b(gstr3b_data, gstr2b_data):
     """
     # Ensure we're working with numeric data
     for df in [gstr3b_data, gstr2b_data]:
-        for col in df.columns:
-            if "Amount" in col or "Tax" in col or "ITC" in col:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        coerce_numeric(df, [col for col in df.columns if "Amount" in col or "Tax" in col or "ITC" in col])
     
     # Prepare results dictionary
     results = {
@@ -36,63 +34,52 @@ def reconcile_itc_gstr3b_gstr2b(gstr3b_data, gstr2b_data):
         }
     }
     
+    # Fields not directly in GSTR-2B have no mapping and are skipped
+    mapped_fields = {gstr3b_field: gstr2b_field for gstr3b_field, gstr2b_field in ITC_GSTR3B_GSTR2B_MAPPING.items()
+                     if gstr2b_field}
+    
+    # Total every mapped field in one reduction per source; absent columns count as 0
+    gstr3b_totals = column_totals(gstr3b_data, list(mapped_fields.keys()))
+    gstr2b_totals = column_totals(gstr2b_data, list(mapped_fields.values()))
+    diff, diff_percent, flagged = compare_totals(gstr3b_totals, gstr2b_totals, AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD)
+    
     # Compare ITC elements between GSTR-3B and GSTR-2B
-    for gstr3b_field, gstr2b_field in ITC_GSTR3B_GSTR2B_MAPPING.items():
-        # Skip if mapping is empty (not directly in GSTR-2B)
-        if not gstr2b_field:
-            continue
-        
-        gstr3b_value = gstr3b_data[gstr3b_field].sum() if gstr3b_field in gstr3b_data.columns else 0
-        gstr2b_value = gstr2b_data[gstr2b_field].sum() if gstr2b_field in gstr2b_data.columns else 0
-        
-        diff = gstr3b_value - gstr2b_value
-        diff_percent = (diff / gstr2b_value * 100) if gstr2b_value != 0 else np.inf
-        
-        comparison = {
-            "itc_type": gstr3b_field,
-            "gstr3b_value": float(gstr3b_value),
-            "gstr2b_field": gstr2b_field,
-            "gstr2b_value": float(gstr2b_value),
-            "difference": float(diff),
-            "difference_percent": float(diff_percent)
-        }
-        
-        results["itc_comparison"].append(comparison)
-        
-        # Record as discrepancy if beyond threshold
-        if abs(diff) > AMOUNT_THRESHOLD and abs(diff_percent) > PERCENTAGE_THRESHOLD:
-            results["discrepancies"].append({
-                "type": "ITC Mismatch",
-                "itc_type": gstr3b_field,
-                "gstr3b_value": float(gstr3b_value),
-                "gstr2b_field": gstr2b_field,
-                "gstr2b_value": float(gstr2b_value),
-                "difference": float(diff),
-                "difference_percent": float(diff_percent)
-            })
+    comparison = pd.DataFrame({
+        "itc_type": list(mapped_fields.keys()),
+        "gstr3b_value": gstr3b_totals,
+        "gstr2b_field": list(mapped_fields.values()),
+        "gstr2b_value": gstr2b_totals,
+        "difference": diff,
+        "difference_percent": diff_percent
+    })
+    results["itc_comparison"] = comparison.to_dict("records")
+    
+    # Record as discrepancy if beyond threshold
+    discrepancies = comparison[flagged]
+    discrepancies.insert(0, "type", "ITC Mismatch")
+    results["discrepancies"] = discrepancies.to_dict("records")
     
     # Calculate Net ITC comparison
     if "Table 4(C)" in gstr3b_data.columns and "Net ITC Available" in gstr2b_data.columns:
         net_gstr3b_itc = gstr3b_data["Table 4(C)"].sum()
         net_gstr2b_itc = gstr2b_data["Net ITC Available"].sum()
         
-        net_diff = net_gstr3b_itc - net_gstr2b_itc
-        net_diff_percent = (net_diff / net_gstr2b_itc * 100) if net_gstr2b_itc != 0 else np.inf
+        net_diff, net_diff_percent, net_flagged = compare_totals([net_gstr3b_itc], [net_gstr2b_itc], AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD)
         
         results["summary"]["total_gstr3b_itc"] = float(net_gstr3b_itc)
         results["summary"]["total_gstr2b_itc"] = float(net_gstr2b_itc)
-        results["summary"]["difference"] = float(net_diff)
-        results["summary"]["difference_percent"] = float(net_diff_percent)
+        results["summary"]["difference"] = float(net_diff[0])
+        results["summary"]["difference_percent"] = float(net_diff_percent[0])
         
         # Add as discrepancy if beyond threshold
-        if abs(net_diff) > AMOUNT_THRESHOLD and abs(net_diff_percent) > PERCENTAGE_THRESHOLD:
+        if net_flagged[0]:
             results["discrepancies"].append({
                 "type": "Net ITC Mismatch",
                 "itc_type": "Net ITC",
                 "gstr3b_value": float(net_gstr3b_itc),
                 "gstr2b_value": float(net_gstr2b_itc),
-                "difference": float(net_diff),
-                "difference_percent": float(net_diff_percent)
+                "difference": float(net_diff[0]),
+                "difference_percent": float(net_diff_percent[0])
             })
     
     # Calculate summary statistics
@@ -0,0 +1,286 @@
+"""
+Invoice matching shared by the GSTR-1 and GSTR-2 reconciliation modules.
+"""
+
+import pandas as pd
+import numpy as np
+
+# Arrow tables are an optional output format for the result buckets
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Numba compiles the amount comparisons into parallel loops when installed
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def amounts_close(left_values, right_values, rtol, atol):
+        """Element-wise np.isclose over two 2-D float arrays"""
+        rows, cols = left_values.shape
+        close = np.empty((rows, cols), dtype=np.bool_)
+        for i in prange(rows):
+            for j in range(cols):
+                a = left_values[i, j]
+                b = right_values[i, j]
+                if a == b:
+                    close[i, j] = True
+                elif np.isfinite(a) and np.isfinite(b):
+                    close[i, j] = abs(a - b) <= atol + rtol * abs(b)
+                else:
+                    # NaN never matches, infinities only match themselves
+                    close[i, j] = False
+        return close
+else:
+    def amounts_close(left_values, right_values, rtol, atol):
+        """Element-wise np.isclose over two 2-D float arrays"""
+        return np.isclose(left_values, right_values, rtol=rtol, atol=atol)
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def amount_differences(left_values, right_values, amount_threshold, percentage_threshold):
+        """Per-amount percentage difference, and whether it is over both thresholds"""
+        rows, cols = left_values.shape
+        differs = np.empty((rows, cols), dtype=np.bool_)
+        percent_diff = np.empty((rows, cols), dtype=np.float64)
+        for i in prange(rows):
+            for j in range(cols):
+                abs_diff = abs(left_values[i, j] - right_values[i, j])
+                largest = np.maximum(abs(left_values[i, j]), abs(right_values[i, j]))
+                percent = abs_diff / np.maximum(largest, 1.0) * 100 if largest > 0 else 0.0
+                percent_diff[i, j] = percent
+                differs[i, j] = abs_diff > amount_threshold and percent > percentage_threshold * 100
+        return differs, percent_diff
+else:
+    def amount_differences(left_values, right_values, amount_threshold, percentage_threshold):
+        """Per-amount percentage difference, and whether it is over both thresholds"""
+        abs_diff = np.abs(left_values - right_values)
+        largest = np.maximum(np.abs(left_values), np.abs(right_values))
+        percent_diff = np.where(largest > 0, abs_diff / np.maximum(largest, 1) * 100, 0)
+        differs = (abs_diff > amount_threshold) & (percent_diff > percentage_threshold * 100)
+        return differs, percent_diff
+
+def key_codes(values):
+    """Integer codes for a shared-category key column, equal exactly when the values read the same as text"""
+    labels = np.append(values.cat.categories.astype(str).to_numpy(dtype=object), '')
+    # Missing values have code -1, which picks the trailing blank
+    return pd.factorize(labels)[0][values.cat.codes.to_numpy()]
+
+def key_ids(left_keys, right_keys):
+    """
+    Numbers the keys of two sources so that equal keys get equal ids.
+
+    Each key column is factorized once over both sources together and the codes
+    are folded into a single integer per record; missing values count as a value.
+
+    Args:
+        left_keys (pd.DataFrame): Key columns of the left source, one row per record
+        right_keys (pd.DataFrame): Key columns of the right source, with the same names
+
+    Returns:
+        tuple: Integer key ids of the left records and of the right records
+    """
+    keys = pd.concat([left_keys, right_keys], ignore_index=True)
+    ids = np.zeros(len(keys), dtype=np.int64)
+    for col in keys.columns:
+        codes, uniques = pd.factorize(keys[col], use_na_sentinel=False)
+        # Re-factorizing after every column keeps the combined ids below the row count
+        ids = pd.factorize(ids * len(uniques) + codes)[0]
+    return ids[:len(left_keys)], ids[len(left_keys):]
+
+def pair_ids(left_ids, right_ids):
+    """
+    Pairs up the distinct key ids of two sources.
+
+    Duplicate keys pair through their first record, so every key pairs with at
+    most one record on each side.
+
+    Args:
+        left_ids (np.ndarray): Key ids of the left records, from key_ids
+        right_ids (np.ndarray): Key ids of the right records, from key_ids
+
+    Returns:
+        pd.DataFrame: One row per distinct key, holding the position of the first
+            record carrying the key on each side ("left_pos", "right_pos", -1 when
+            absent) and a merge-style indicator ("_merge")
+    """
+    key_count = max(left_ids.max(initial=-1), right_ids.max(initial=-1)) + 1
+
+    positions = {}
+    for side, ids in [("left", left_ids), ("right", right_ids)]:
+        first = np.full(key_count, -1, dtype=np.int64)
+        found, first_pos = np.unique(ids, return_index=True)
+        first[found] = first_pos
+        positions[side] = first
+
+    in_left = positions["left"] >= 0
+    in_right = positions["right"] >= 0
+    indicator = np.where(in_left & in_right, "both", np.where(in_left, "left_only", "right_only"))
+
+    return pd.DataFrame({
+        "left_pos": positions["left"],
+        "right_pos": positions["right"],
+        "_merge": pd.Categorical(indicator, categories=["left_only", "right_only", "both"]),
+    })
+
+def pair_keys(left_keys, right_keys):
+    """
+    Pairs up the distinct keys of two sources, hashing every key only once.
+
+    Args:
+        left_keys (pd.DataFrame): Key columns of the left source, one row per record
+        right_keys (pd.DataFrame): Key columns of the right source, with the same names
+
+    Returns:
+        pd.DataFrame: See pair_ids
+    """
+    return pair_ids(*key_ids(left_keys, right_keys))
+
+def key_positions(key_status, which, side):
+    """
+    Positions of the first records for the keys found on the given side(s).
+
+    Args:
+        key_status (pd.DataFrame): Output of pair_keys
+        which (str): Merge indicator to select ("both", "left_only" or "right_only")
+        side (str): "left" or "right"
+
+    Returns:
+        np.ndarray: Integer row positions into that side's frame
+    """
+    return key_status.loc[key_status["_merge"] == which, f"{side}_pos"].to_numpy(dtype=np.int64)
+
+def text_values(values):
+    """Render a column as comparison strings, with blanks for missing values"""
+    return values.map(lambda v: str(v) if pd.notna(v) else "").to_numpy(dtype=object)
+
+def to_table(df):
+    """Convert a result frame to a pyarrow Table, mixed-type object columns as text"""
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # e.g. an amount column holding stray text next to numbers
+        mixed = {col: df[col].map(lambda v: str(v) if pd.notna(v) else None)
+                 for col in df.columns if df[col].dtype == object}
+        return pa.Table.from_pandas(df.assign(**mixed), preserve_index=False)
+
+def reconcile_frames(left, right, key_columns, numeric_columns, text_columns, right_name, rtol, atol,
+                     as_tables=False, left_name="gstr1"):
+    """
+    Matches two sources on their key columns and compares the paired records.
+
+    Records with an incomplete key are left out. Every record of a key found on
+    one side only is reported as missing; for keys found on both sides the first
+    record of each side is compared, amounts with np.isclose and text fields as
+    strings.
+
+    Args:
+        left (pd.DataFrame): Return records (GSTR-1 or GSTR-2A/2B)
+        right (pd.DataFrame): Records of the source compared against, same column names
+        key_columns (list): Columns identifying an invoice
+        numeric_columns (list): Amount columns compared within tolerance
+        text_columns (list): Columns compared as exact strings
+        right_name (str): Name used for the right-hand value in discrepancies,
+            e.g. "einvoice" gives "einvoice_value"
+        rtol (float): Relative tolerance for amount comparisons
+        atol (float): Absolute tolerance for amount comparisons
+        as_tables (bool): Return every bucket as a pyarrow Table instead of a list
+            of dicts; mismatched rows then carry the right-hand value of each
+            compared column as "<column>_<right_name>" rather than "discrepancies"
+        left_name (str): Name used for the left-hand value in discrepancies
+
+    Returns:
+        dict: "matched" and "mismatched" left records (mismatched ones carrying
+            their "discrepancies"), plus "missing_in_left" and "missing_in_right"
+    """
+    if as_tables and pa is None:
+        raise ImportError("pyarrow is required for as_tables=True")
+
+    # Rows with an incomplete key can never match, so leave them out
+    left = left.dropna(subset=key_columns).reset_index(drop=True)
+    right = right.dropna(subset=key_columns).reset_index(drop=True)
+
+    # Pairing integer ids beats both merge and an index join on the composite key,
+    # which has to build a MultiIndex hash table on each side first
+    left_ids, right_ids = key_ids(left[key_columns], right[key_columns])
+    key_status = pair_ids(left_ids, right_ids)
+
+    # Every row carrying a key that only one side has is missing from the other
+    missing_in_left = right[~np.isin(right_ids, left_ids)]
+    missing_in_right = left[~np.isin(left_ids, right_ids)]
+
+    left_common = left.iloc[key_positions(key_status, "both", "left")]
+    right_common = right.iloc[key_positions(key_status, "both", "right")]
+
+    # Compare every amount column of every pair in one shot; blank or unreadable
+    # amounts count as 0
+    numeric_columns = [col for col in numeric_columns
+                       if col in left_common.columns and col in right_common.columns]
+    left_values = left_common[numeric_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64, na_value=0.0)
+    right_values = right_common[numeric_columns].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64, na_value=0.0)
+
+    close = amounts_close(left_values, right_values, rtol, atol)
+    has_discrepancy = ~close.all(axis=1)
+    diff = left_values - right_values
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diff_percent = np.where(right_values != 0, diff / right_values * 100, np.inf)
+
+    # String comparison for non-numeric fields
+    text_columns = [col for col in text_columns
+                    if col in left_common.columns and col in right_common.columns]
+    left_text = {col: text_values(left_common[col]) for col in text_columns}
+    right_text = {col: text_values(right_common[col]) for col in text_columns}
+    for col in text_columns:
+        has_discrepancy |= left_text[col] != right_text[col]
+
+    if as_tables:
+        mismatched = left_common[has_discrepancy].reset_index(drop=True)
+        for j, col in enumerate(numeric_columns):
+            mismatched[f"{col}_{right_name}"] = right_values[has_discrepancy, j]
+        for col in text_columns:
+            mismatched[f"{col}_{right_name}"] = right_text[col][has_discrepancy]
+        
+        # Straight from the columns, no per-record Python objects
+        return {
+            "matched": to_table(left_common[~has_discrepancy]),
+            "mismatched": to_table(mismatched),
+            "missing_in_left": to_table(missing_in_left),
+            "missing_in_right": to_table(missing_in_right),
+        }
+
+    # Only mismatched pairs need their discrepancies spelled out
+    matched = []
+    mismatched = []
+    left_value = f"{left_name}_value"
+    right_value = f"{right_name}_value"
+    for i, row in enumerate(left_common.to_dict("records")):
+        if not has_discrepancy[i]:
+            matched.append(row)
+            continue
+
+        discrepancies = [{
+            "field": col,
+            left_value: float(left_values[i, j]),
+            right_value: float(right_values[i, j]),
+            "difference": float(diff[i, j]),
+            "difference_percent": float(diff_percent[i, j])
+        } for j, col in enumerate(numeric_columns) if not close[i, j]]
+
+        discrepancies.extend({
+            "field": col,
+            left_value: left_text[col][i],
+            right_value: right_text[col][i]
+        } for col in text_columns if left_text[col][i] != right_text[col][i])
+
+        mismatched.append({**row, **{"discrepancies": discrepancies}})
+
+    return {
+        "matched": matched,
+        "mismatched": mismatched,
+        "missing_in_left": missing_in_left.to_dict("records"),
+        "missing_in_right": missing_in_right.to_dict("records"),
+    }
@@ -2,9 +2,32 @@
 Module to reconcile turnover as per Books vs GST Returns vs Financial Statements.
 """
 
-import pandas as pd
 import numpy as np
-from config import TURNOVER_MAPPING, AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD
+from utils.data_processor import coerce_numeric, column_totals, compare_totals
+from config import (TURNOVER_BOOKS_FIELDS, TURNOVER_GST_FIELDS, TURNOVER_FS_FIELDS,
+                    AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD)
+
+# Books, GST return and financial statement columns holding turnover amounts
+TURNOVER_COLUMNS = frozenset(
+    field for field in TURNOVER_BOOKS_FIELDS + TURNOVER_GST_FIELDS + TURNOVER_FS_FIELDS if field
+)
+
+def _source_totals(df, fields, total_field):
+    """
+    Totals the turnover components of one source, and its overall turnover
+    column in the same reduction.
+    
+    Args:
+        df (pd.DataFrame): Turnover data of the source
+        fields (tuple): Component columns, in mapping order
+        total_field (str): Column holding the source's overall turnover
+        
+    Returns:
+        tuple: Component totals (np.ndarray) and the overall turnover total
+    """
+    columns = fields if total_field in fields else fields + (total_field,)
+    totals = column_totals(df, columns)
+    return totals[:len(fields)], totals[columns.index(total_field)]
 
 def reconcile_turnover(books_data, gst_returns_data, financial_statements_data):
     """
@@ -20,9 +43,7 @@ def reconcile_turnover(books_data, gst_returns_data, financial_statements_data):
     """
     # Ensure we're working with numeric data
     for df in [books_data, gst_returns_data, financial_statements_data]:
-        for col in df.columns:
-            if col in [item for sublist in TURNOVER_MAPPING.values() for item in sublist] or col in TURNOVER_MAPPING.keys():
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        coerce_numeric(df, [col for col in df.columns if col in TURNOVER_COLUMNS])
     
     # Prepare results dictionary
     results = {
@@ -37,35 +58,45 @@ def reconcile_turnover(books_data, gst_returns_data, financial_statements_data):
         }
     }
     
-    # Compare each turnover component
-    for books_field, (gst_field, fs_field) in TURNOVER_MAPPING.items():
-        books_value = books_data[books_field].sum() if books_field in books_data.columns else 0
-        gst_value = gst_returns_data[gst_field].sum() if gst_field and gst_field in gst_returns_data.columns else 0
-        fs_value = financial_statements_data[fs_field].sum() if fs_field and fs_field in financial_statements_data.columns else 0
-        
-        # Calculate differences
-        books_gst_diff = books_value - gst_value
-        books_fs_diff = books_value - fs_value
-        gst_fs_diff = gst_value - fs_value
-        
-        # Calculate percentages
-        books_gst_percent = (books_gst_diff / gst_value * 100) if gst_value != 0 else np.inf
-        books_fs_percent = (books_fs_diff / fs_value * 100) if fs_value != 0 else np.inf
-        gst_fs_percent = (gst_fs_diff / fs_value * 100) if fs_value != 0 else np.inf
-        
+    # Total every turnover component in one reduction per source; absent columns
+    # and components with no GST return or financial statement field count as 0
+    books_totals, books_turnover = _source_totals(books_data, TURNOVER_BOOKS_FIELDS, "Total Sales")
+    gst_totals, gst_turnover = _source_totals(gst_returns_data, TURNOVER_GST_FIELDS, "Annual Aggregate Turnover")
+    fs_totals, fs_turnover = _source_totals(financial_statements_data, TURNOVER_FS_FIELDS, "Revenue from Operations")
+    
+    # Compare all three pairs of sources for all components in one scan:
+    # rows are books vs GST, books vs financial statements, GST vs financial statements
+    diff, percent, flagged = compare_totals(
+        np.stack([books_totals, books_totals, gst_totals]),
+        np.stack([gst_totals, fs_totals, fs_totals]),
+        AMOUNT_THRESHOLD, PERCENTAGE_THRESHOLD
+    )
+    
+    # Only components mapped on both sides can be discrepancies
+    has_gst = np.array([bool(gst_field) for gst_field in TURNOVER_GST_FIELDS], dtype=bool)
+    has_fs = np.array([bool(fs_field) for fs_field in TURNOVER_FS_FIELDS], dtype=bool)
+    flagged &= np.stack([has_gst, has_fs, has_gst & has_fs])
+    
+    # Python floats and bools for the result dicts, converted once per array
+    books_values, gst_values, fs_values = books_totals.tolist(), gst_totals.tolist(), fs_totals.tolist()
+    books_gst_diff, books_fs_diff, gst_fs_diff = diff.tolist()
+    books_gst_percent, books_fs_percent, gst_fs_percent = percent.tolist()
+    books_gst_flagged, books_fs_flagged, gst_fs_flagged = flagged.tolist()
+    
+    for i, books_field in enumerate(TURNOVER_BOOKS_FIELDS):
         comparison = {
             "turnover_type": books_field,
-            "books_value": float(books_value),
-            "gst_field": gst_field,
-            "gst_value": float(gst_value),
-            "fs_field": fs_field,
-            "fs_value": float(fs_value),
-            "books_gst_diff": float(books_gst_diff),
-            "books_fs_diff": float(books_fs_diff),
-            "gst_fs_diff": float(gst_fs_diff),
-            "books_gst_percent": float(books_gst_percent),
-            "books_fs_percent": float(books_fs_percent),
-            "gst_fs_percent": float(gst_fs_percent)
+            "books_value": books_values[i],
+            "gst_field": TURNOVER_GST_FIELDS[i],
+            "gst_value": gst_values[i],
+            "fs_field": TURNOVER_FS_FIELDS[i],
+            "fs_value": fs_values[i],
+            "books_gst_diff": books_gst_diff[i],
+            "books_fs_diff": books_fs_diff[i],
+            "gst_fs_diff": gst_fs_diff[i],
+            "books_gst_percent": books_gst_percent[i],
+            "books_fs_percent": books_fs_percent[i],
+            "gst_fs_percent": gst_fs_percent[i]
         }
         
         results["turnover_comparison"].append(comparison)
@@ -76,31 +107,31 @@ def reconcile_turnover(books_data, gst_returns_data, financial_statements_data):
             "discrepancies": []
         }
         
-        if abs(books_gst_diff) > AMOUNT_THRESHOLD and abs(books_gst_percent) > PERCENTAGE_THRESHOLD and gst_field:
+        if books_gst_flagged[i]:
             discrepancy["discrepancies"].append({
                 "type": "Books vs GST Returns",
-                "books_value": float(books_value),
-                "gst_value": float(gst_value),
-                "difference": float(books_gst_diff),
-                "difference_percent": float(books_gst_percent)
+                "books_value": comparison["books_value"],
+                "gst_value": comparison["gst_value"],
+                "difference": comparison["books_gst_diff"],
+                "difference_percent": comparison["books_gst_percent"]
             })
         
-        if abs(books_fs_diff) > AMOUNT_THRESHOLD and abs(books_fs_percent) > PERCENTAGE_THRESHOLD and fs_field:
+        if books_fs_flagged[i]:
             discrepancy["discrepancies"].append({
                 "type": "Books vs Financial Statements",
-                "books_value": float(books_value),
-                "fs_value": float(fs_value),
-                "difference": float(books_fs_diff),
-                "difference_percent": float(books_fs_percent)
+                "books_value": comparison["books_value"],
+                "fs_value": comparison["fs_value"],
+                "difference": comparison["books_fs_diff"],
+                "difference_percent": comparison["books_fs_percent"]
             })
         
-        if abs(gst_fs_diff) > AMOUNT_THRESHOLD and abs(gst_fs_percent) > PERCENTAGE_THRESHOLD and gst_field and fs_field:
+        if gst_fs_flagged[i]:
             discrepancy["discrepancies"].append({
                 "type": "GST Returns vs Financial Statements",
-                "gst_value": float(gst_value),
-                "fs_value": float(fs_value),
-                "difference": float(gst_fs_diff),
-                "difference_percent": float(gst_fs_percent)
+                "gst_value": comparison["gst_value"],
+                "fs_value": comparison["fs_value"],
+                "difference": comparison["gst_fs_diff"],
+                "difference_percent": comparison["gst_fs_percent"]
             })
         
         if discrepancy["discrepancies"]:
@@ -108,24 +139,19 @@ def reconcile_turnover(books_data, gst_returns_data, financial_statements_data):
     
     # Calculate total turnover for each source
     if "Total Sales" in books_data.columns:
-        results["summary"]["total_books_turnover"] = float(books_data["Total Sales"].sum())
+        results["summary"]["total_books_turnover"] = float(books_turnover)
     
     if "Annual Aggregate Turnover" in gst_returns_data.columns:
-        results["summary"]["total_gst_turnover"] = float(gst_returns_data["Annual Aggregate Turnover"].sum())
+        results["summary"]["total_gst_turnover"] = float(gst_turnover)
     
     if "Revenue from Operations" in financial_statements_data.columns:
-        results["summary"]["total_fs_turnover"] = float(financial_statements_data["Revenue from Operations"].sum())
+        results["summary"]["total_fs_turnover"] = float(fs_turnover)
     
-    # Calculate summary statistics
-    results["summary"]["total_discrepancies"] = sum(len(d["discrepancies"]) for d in results["discrepancies"])
+    # Calculate summary statistics straight from the flagged differences
+    results["summary"]["total_discrepancies"] = int(flagged.sum())
     
     # Find maximum discrepancy
-    all_discrepancies = []
-    for discrepancy_group in results["discrepancies"]:
-        for discrepancy in discrepancy_group["discrepancies"]:
-            all_discrepancies.append(abs(discrepancy["difference"]))
-    
-    if all_discrepancies:
-        results["summary"]["max_discrepancy"] = float(max(all_discrepancies))
+    if flagged.any():
+        results["summary"]["max_discrepancy"] = float(np.abs(diff[flagged]).max())
     
     return results
\ No newline at end of file
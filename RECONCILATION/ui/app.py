@@ -9,9 +9,9 @@ import sys
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# The reconciliation and report views pull in pandas and the Excel stack, so they
+# are imported when first shown rather than at startup
 from ui.dashboard import Dashboard
-from ui.reconcilation_view import ReconciliationView
-from ui.report_view import ReportView
 import config
 
 class ReconciliationApp(ttk.Frame):
@@ -23,6 +23,7 @@ class ReconciliationApp(ttk.Frame):
         
         # Initialize instance variables
         self.current_view = None
+        self.views = {}
         self.input_files = {}
         
         # Setup UI components
@@ -167,17 +168,25 @@ class ReconciliationApp(ttk.Frame):
     def show_dashboard(self):
         """Show dashboard view"""
         self.clear_content()
-        self.current_view = Dashboard(self.content_frame)
+        
+        # The dashboard never changes, so one instance is kept and re-packed
+        if "dashboard" not in self.views:
+            self.views["dashboard"] = Dashboard(self.content_frame)
+        self.current_view = self.views["dashboard"]
         self.current_view.pack(fill=tk.BOTH, expand=True)
     
     def show_reconciliation_view(self, recon_type):
         """Show reconciliation view for specific type"""
+        from ui.reconcilation_view import ReconciliationView
+        
         self.clear_content()
         self.current_view = ReconciliationView(self.content_frame, recon_type)
         self.current_view.pack(fill=tk.BOTH, expand=True)
     
     def show_reports(self):
         """Show reports view"""
+        from ui.report_view import ReportView
+        
         self.clear_content()
         self.current_view = ReportView(self.content_frame)
         self.current_view.pack(fill=tk.BOTH, expand=True)
@@ -187,13 +196,15 @@ class ReconciliationApp(ttk.Frame):
         messagebox.showinfo("Settings", "Settings will be implemented in future versions.")
     
     def clear_content(self):
-        """Clear content area"""
-        if self.current_view:
-            self.current_view.destroy()
-            self.current_view = None
+        """Clear content area, hiding cached views and destroying the rest"""
+        cached_views = list(self.views.values())
+        self.current_view = None
         
         for widget in self.content_frame.winfo_children():
-            widget.destroy()
+            if widget in cached_views:
+                widget.pack_forget()
+            else:
+                widget.destroy()
     
     def open_files(self):
         """Open file dialog to select input files"""
@@ -9,6 +9,40 @@ import sys
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Title, description and reconciliation type of each dashboard card
+RECON_CARDS = [
+    ("GSTR-1 vs Books",
+     "Reconcile sales data between GSTR-1 and books of accounts",
+     "gstr1_books"),
+    ("GSTR-2A/2B vs Books",
+     "Reconcile purchase data between GSTR-2A/2B and books",
+     "gstr2_books"),
+    ("GSTR-3B vs GSTR-1",
+     "Reconcile liability reporting between GSTR-3B and GSTR-1",
+     "gstr3b_gstr1"),
+    ("GSTR-3B vs Books",
+     "Reconcile output tax between GSTR-3B and books",
+     "gstr3b_books"),
+    ("ITC Reconciliation",
+     "Reconcile ITC between GSTR-3B and GSTR-2B",
+     "itc_gstr3b_gstr2b"),
+    ("ITC Eligibility",
+     "Reconcile ITC in books vs eligible ITC",
+     "itc_eligibility"),
+    ("GSTR-1 vs E-Way Bills",
+     "Reconcile GSTR-1 with E-Way bills",
+     "gstr1_eway"),
+    ("GSTR-2A/2B vs E-Way Bills",
+     "Reconcile GSTR-2A/2B with E-Way bills",
+     "gstr2_eway"),
+    ("GSTR-1 vs E-invoice",
+     "Reconcile GSTR-1 with E-invoices",
+     "gstr1_einvoice"),
+    ("Turnover Reconciliation",
+     "Reconcile turnover across books, GST returns, and financial statements",
+     "turnover_recon"),
+]
+
 class Dashboard(ttk.Frame):
     """Dashboard view showing reconciliation options and summary"""
     
@@ -47,56 +81,10 @@ class Dashboard(ttk.Frame):
         recon_frame.columnconfigure(1, weight=1)
         recon_frame.columnconfigure(2, weight=1)
         
-        # Reconciliation option cards
-        self.create_recon_card(recon_frame, 0, 0, 
-                              "GSTR-1 vs Books",
-                              "Reconcile sales data between GSTR-1 and books of accounts",
-                              "gstr1_books")
-        
-        self.create_recon_card(recon_frame, 0, 1, 
-                              "GSTR-2A/2B vs Books",
-                              "Reconcile purchase data between GSTR-2A/2B and books",
-                              "gstr2_books")
-        
-        self.create_recon_card(recon_frame, 0, 2, 
-                              "GSTR-3B vs GSTR-1",
-                              "Reconcile liability reporting between GSTR-3B and GSTR-1",
-                              "gstr3b_gstr1")
-        
-        self.create_recon_card(recon_frame, 1, 0, 
-                              "GSTR-3B vs Books",
-                              "Reconcile output tax between GSTR-3B and books",
-                              "gstr3b_books")
-        
-        self.create_recon_card(recon_frame, 1, 1, 
-                              "ITC Reconciliation",
-                              "Reconcile ITC between GSTR-3B and GSTR-2B",
-                              "itc_gstr3b_gstr2b")
-        
-        self.create_recon_card(recon_frame, 1, 2, 
-                              "ITC Eligibility",
-                              "Reconcile ITC in books vs eligible ITC",
-                              "itc_eligibility")
-        
-        self.create_recon_card(recon_frame, 2, 0, 
-                              "GSTR-1 vs E-Way Bills",
-                              "Reconcile GSTR-1 with E-Way bills",
-                              "gstr1_eway")
-        
-        self.create_recon_card(recon_frame, 2, 1, 
-                              "GSTR-2A/2B vs E-Way Bills",
-                              "Reconcile GSTR-2A/2B with E-Way bills",
-                              "gstr2_eway")
-        
-        self.create_recon_card(recon_frame, 2, 2, 
-                              "GSTR-1 vs E-invoice",
-                              "Reconcile GSTR-1 with E-invoices",
-                              "gstr1_einvoice")
-        
-        self.create_recon_card(recon_frame, 3, 0, 
-                              "Turnover Reconciliation",
-                              "Reconcile turnover across books, GST returns, and financial statements",
-                              "turnover_recon")
+        # Reconciliation option cards, three per row
+        for index, (title, description, recon_type) in enumerate(RECON_CARDS):
+            row, col = divmod(index, 3)
+            self.create_recon_card(recon_frame, row, col, title, description, recon_type)
         
         # Status section
         status_frame = ttk.Frame(self)
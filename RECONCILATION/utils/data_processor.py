@@ -6,6 +6,30 @@ import numpy as np
 from datetime import datetime
 import config
 
+# Numba compiles the column totals into a parallel loop when installed
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _column_sums(values):
+        """Column sums of a 2-D float array, skipping NaN as DataFrame.sum does"""
+        rows, cols = values.shape
+        totals = np.zeros(cols)
+        for j in prange(cols):
+            total = 0.0
+            for i in range(rows):
+                if not np.isnan(values[i, j]):
+                    total += values[i, j]
+            totals[j] = total
+        return totals
+else:
+    def _column_sums(values):
+        """Column sums of a 2-D float array, skipping NaN as DataFrame.sum does"""
+        return np.nansum(values, axis=0)
+
 def process_reconciliation(recon_type, source1_df, source2_df, source3_df=None, 
                           from_date=None, to_date=None, 
                           amount_threshold=None, percent_threshold=None):
@@ -338,4 +362,123 @@ def apply_thresholds(df, amount_threshold, percent_threshold):
         'Only in Source 2': 'yellow'
     })
     
-    return df
\ No newline at end of file
+    return df
+
+def share_categories(left_df, right_df, columns):
+    """
+    Convert key columns of two dataframes to categoricals with one shared set of categories
+    
+    Parameters:
+    -----------
+    left_df : DataFrame
+        First dataframe
+    right_df : DataFrame
+        Second dataframe
+    columns : list
+        Key columns to convert (columns missing from either frame are skipped)
+    
+    Returns:
+    --------
+    tuple
+        Both dataframes with the key columns stored as category codes
+    """
+    converted = {}
+    for col in columns:
+        if col in left_df.columns and col in right_df.columns:
+            categories = pd.concat([left_df[col], right_df[col]], ignore_index=True).dropna().unique()
+            converted[col] = pd.CategoricalDtype(categories)
+    
+    # Identical categories on both sides let equality and merges work on the int codes
+    left_df = left_df.astype(converted)
+    right_df = right_df.astype(converted)
+    
+    return left_df, right_df
+
+def coerce_numeric(df, columns):
+    """
+    Convert columns to numbers in place, in one pass over all of them
+    
+    Parameters:
+    -----------
+    df : DataFrame
+        Dataframe to convert
+    columns : list
+        Columns to convert; blank or unreadable values become 0
+    
+    Returns:
+    --------
+    DataFrame
+        The same dataframe
+    """
+    converted = {}
+    for col in columns:
+        values = df[col]
+        # Columns that are already numeric only need their blanks filled, and
+        # are left alone when they have none
+        if not pd.api.types.is_numeric_dtype(values):
+            converted[col] = pd.to_numeric(values, errors='coerce').fillna(0)
+        elif values.hasnans:
+            converted[col] = values.fillna(0)
+    
+    if converted:
+        # One assignment for all columns; DataFrame.apply would skip empty frames
+        df[list(converted)] = pd.DataFrame(converted, index=df.index)
+    return df
+
+def column_totals(df, columns):
+    """
+    Total several columns of a dataframe in one pass
+    
+    Parameters:
+    -----------
+    df : DataFrame
+        Dataframe holding the amounts
+    columns : list
+        Columns to total; columns missing from the dataframe total 0
+    
+    Returns:
+    --------
+    ndarray
+        Float totals in the order of columns
+    """
+    totals = np.zeros(len(columns))
+    present = [i for i, col in enumerate(columns) if col in df.columns]
+    
+    # Copy each present column once into a column-major block, so every column is
+    # summed from contiguous memory; absent columns are never materialized
+    values = np.empty((len(df), len(present)), dtype=np.float64, order='F')
+    for j, i in enumerate(present):
+        values[:, j] = df[columns[i]].to_numpy(dtype=np.float64, na_value=np.nan)
+    
+    totals[present] = _column_sums(values)
+    return totals
+
+def compare_totals(source1_totals, source2_totals, amount_threshold, percent_threshold):
+    """
+    Compare matching totals of two sources in one pass
+    
+    Parameters:
+    -----------
+    source1_totals : array-like
+        Totals of the first source
+    source2_totals : array-like
+        Totals of the second source, in the same order
+    amount_threshold : float
+        Absolute difference above which a total is flagged
+    percent_threshold : float
+        Percentage difference above which a total is flagged
+    
+    Returns:
+    --------
+    tuple
+        Differences, differences as a percentage of the second source's totals
+        (inf where that total is 0), and whether each is beyond both thresholds
+    """
+    # Accepts plain lists too, such as the single Net ITC totals
+    source1_totals = np.asarray(source1_totals, dtype=np.float64)
+    source2_totals = np.asarray(source2_totals, dtype=np.float64)
+    diff = source1_totals - source2_totals
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diff_percent = np.where(source2_totals != 0, diff / source2_totals * 100, np.inf)
+    flagged = (np.abs(diff) > amount_threshold) & (np.abs(diff_percent) > percent_threshold)
+    return diff, diff_percent, flagged
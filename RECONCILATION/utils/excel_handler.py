@@ -9,6 +9,9 @@ which are used extensively throughout the GST reconciliation process.
 """
 
 import os
+import io
+import hashlib
+import tempfile
 import pandas as pd
 import numpy as np
 import logging
@@ -24,7 +27,25 @@ logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def read_excel_file(file_path, sheet_name=None):
+# calamine parses .xlsx much faster than openpyxl when it is installed
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None
+
+# Optional Polars reader for large workbooks
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+# Parsed sheets cached as Parquet; bump the version when reader output changes
+EXCEL_CACHE_DIR = os.path.join(tempfile.gettempdir(), "gst_recon_excel_cache")
+EXCEL_CACHE_VERSION = 2
+EXCEL_CACHE_MAX_ENTRIES = 32
+
+def read_excel_file(file_path, sheet_name=None, use_polars=False, dtype_backend=None):
     """
     Read data from Excel file.
     
@@ -32,28 +53,45 @@ def read_excel_file(file_path, sheet_name=None):
         file_path (str): Path to the Excel file
         sheet_name (str or list, optional): Sheet name(s) to read. 
                                            If None, reads all sheets.
+        use_polars (bool, optional): Parse all sheets with Polars when it is
+                                     installed, falling back to pandas if that fails
+        dtype_backend (str, optional): 'pyarrow' or 'numpy_nullable' to read into
+                                       those dtypes; defaults to NumPy dtypes
     
     Returns:
         pandas.DataFrame or dict of DataFrames: Data from the Excel file
     """
     try:
         logger.info(f"Reading Excel file: {file_path}")
+        backend_kwargs = {'dtype_backend': dtype_backend} if dtype_backend else {}
         
         if sheet_name is None:
-            # Get all sheet names first to inspect what's available
-            xlsx = pd.ExcelFile(file_path)
-            available_sheets = xlsx.sheet_names
-            logger.info(f"Available sheets: {available_sheets}")
-            
-            # Read all sheets into a dictionary of DataFrames
-            data = {}
-            for sheet in available_sheets:
+            data = None
+            if use_polars and pl is not None:
                 try:
-                    df = pd.read_excel(file_path, sheet_name=sheet)
-                    if not df.empty:
-                        data[sheet] = df
+                    sheets = pl.read_excel(file_path, engine='calamine', sheet_id=0, raise_if_empty=False)
+                    data = {sheet: _polars_to_pandas(df) for sheet, df in sheets.items()}
+                    if dtype_backend:
+                        data = {sheet: df.convert_dtypes(dtype_backend=dtype_backend) for sheet, df in data.items()}
                 except Exception as e:
-                    logger.warning(f"Could not read sheet '{sheet}': {str(e)}")
+                    logger.warning(f"Polars could not read the workbook, using pandas: {str(e)}")
+                    data = None
+            
+            if data is None:
+                # Open the workbook once and parse each sheet from it
+                data = {}
+                with pd.ExcelFile(file_path, engine=EXCEL_ENGINE) as xlsx:
+                    available_sheets = xlsx.sheet_names
+                    logger.info(f"Available sheets: {available_sheets}")
+                    
+                    # Read all sheets into a dictionary of DataFrames
+                    for sheet in available_sheets:
+                        try:
+                            data[sheet] = xlsx.parse(sheet, **backend_kwargs)
+                        except Exception as e:
+                            logger.warning(f"Could not read sheet '{sheet}': {str(e)}")
+            
+            data = {sheet: df for sheet, df in data.items() if not df.empty}
             
             # If only one sheet was read, return just the DataFrame instead of a dict
             if len(data) == 1:
@@ -62,12 +100,148 @@ def read_excel_file(file_path, sheet_name=None):
             
         else:
             # Read specific sheet(s)
-            return pd.read_excel(file_path, sheet_name=sheet_name)
+            return pd.read_excel(file_path, sheet_name=sheet_name, engine=EXCEL_ENGINE, **backend_kwargs)
             
     except Exception as e:
         logger.error(f"Error reading Excel file: {str(e)}")
         raise IOError(f"Failed to read Excel file: {str(e)}")
 
+def _polars_to_pandas(df):
+    """
+    Convert a Polars DataFrame to pandas, which the rest of the pipeline works on.
+    """
+    return pd.DataFrame({col: df[col].to_numpy() for col in df.columns})
+
+def read_excel_polars(raw, wanted, text_columns):
+    """
+    Read an Excel sheet with Polars (calamine engine) into a pandas DataFrame.
+    
+    Args:
+        raw (bytes): Contents of the workbook
+        wanted (set or None): Column names to keep (compared stripped), None for all
+        text_columns (list): Columns read as text
+    
+    Returns:
+        pandas.DataFrame: The selected columns, identifiers as text
+    """
+    header = pl.read_excel(io.BytesIO(raw), engine='calamine', read_options={'n_rows': 0}).columns
+    columns = [col for col in header if wanted is None or str(col).strip() in wanted]
+    text_set = set(text_columns)
+    df = pl.read_excel(
+        io.BytesIO(raw),
+        engine='calamine',
+        columns=columns,
+        schema_overrides={col: pl.Utf8 for col in columns if col.strip() in text_set}
+    )
+    return _polars_to_pandas(df).astype({col: str for col in df.columns if col.strip() in text_set})
+
+def read_excel_pandas(raw, wanted, text_columns):
+    """
+    Read an Excel sheet with pandas.
+    
+    Args:
+        raw (bytes): Contents of the workbook
+        wanted (set or None): Column names to keep (compared stripped), None for all
+        text_columns (list): Columns read as text
+    
+    Returns:
+        pandas.DataFrame: The selected columns, identifiers as text
+    """
+    # Text columns are matched on stripped headers, as the column selection is
+    header = pd.read_excel(io.BytesIO(raw), nrows=0, engine=EXCEL_ENGINE).columns
+    text_set = set(text_columns)
+    # read_excel cannot stream row chunks; only the requested columns are kept
+    # and every record is needed for matching, so the sheet is read whole
+    return pd.read_excel(
+        io.BytesIO(raw),
+        usecols=(lambda col: str(col).strip() in wanted) if wanted is not None else None,
+        dtype={col: str for col in header if str(col).strip() in text_set},
+        engine=EXCEL_ENGINE
+    )
+
+def _evict_cache(cache_dir, max_entries):
+    """
+    Remove the least recently used Parquet files beyond max_entries from cache_dir.
+    
+    Args:
+        cache_dir (str): Directory holding the cached files
+        max_entries (int): Number of files to keep
+    """
+    try:
+        entries = [entry for entry in os.scandir(cache_dir) if entry.name.endswith('.parquet')]
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in entries[max_entries:]:
+            os.remove(entry.path)
+    except OSError:
+        # Another process may be evicting the same files
+        pass
+
+def read_mapped_excel(file, columns=None, text_columns=(), use_polars=False):
+    """
+    Read the first sheet of an Excel file, optionally only some of its columns.
+    
+    Parsed sheets are kept as Parquet in EXCEL_CACHE_DIR, keyed by the file
+    contents, the columns read and the reader used, so a re-run on the same
+    workbook skips Excel. Only the EXCEL_CACHE_MAX_ENTRIES most recently used
+    sheets are kept.
+    
+    Args:
+        file (str or file-like): Path to the Excel file or an open binary file
+        columns (iterable, optional): Column names to read (compared stripped).
+                                      Defaults to None, which reads every column.
+        text_columns (iterable, optional): Columns read as text so identifiers keep
+                                           their exact form
+        use_polars (bool, optional): Parse the sheet with Polars when it is
+                                     installed, falling back to pandas if that fails
+    
+    Returns:
+        pandas.DataFrame: Data from the sheet
+    """
+    if hasattr(file, 'read'):
+        raw = file.read()
+    else:
+        with open(file, 'rb') as f:
+            raw = f.read()
+    
+    wanted = set(columns) if columns is not None else None
+    use_polars = use_polars and pl is not None
+    reader = f"polars-{pl.__version__}" if use_polars else f"pandas-{pd.__version__}-{EXCEL_ENGINE}"
+    digest = hashlib.blake2b(raw, digest_size=16)
+    digest.update(repr((
+        EXCEL_CACHE_VERSION, reader,
+        sorted(wanted) if wanted is not None else None, sorted(text_columns)
+    )).encode())
+    cache_path = os.path.join(EXCEL_CACHE_DIR, f"excel_{digest.hexdigest()}.parquet")
+    
+    if os.path.exists(cache_path):
+        try:
+            df = pd.read_parquet(cache_path)
+            # Mark as recently used for eviction
+            os.utime(cache_path)
+            return df
+        except Exception:
+            # Unreadable cache file, parse the workbook again
+            pass
+    
+    if use_polars:
+        try:
+            df = read_excel_polars(raw, wanted, text_columns)
+        except Exception:
+            # Fall back to the pandas reader, whose output is not cached under this key
+            return read_excel_pandas(raw, wanted, text_columns)
+    else:
+        df = read_excel_pandas(raw, wanted, text_columns)
+    
+    try:
+        os.makedirs(EXCEL_CACHE_DIR, exist_ok=True)
+        df.to_parquet(cache_path, compression='zstd')
+        _evict_cache(EXCEL_CACHE_DIR, EXCEL_CACHE_MAX_ENTRIES)
+    except (ImportError, ValueError, TypeError, OSError):
+        # No Parquet engine installed, columns with mixed types or an unwritable
+        # cache directory; skip the cache
+        pass
+    return df
+
 def write_excel_file(data, file_path, sheet_name="Sheet1", include_index=False):
     """
     Write data to Excel file.
@@ -324,8 +498,9 @@ def get_sheet_names(file_path):
         list: List of sheet names
     """
     try:
-        xlsx = pd.ExcelFile(file_path)
-        return xlsx.sheet_names
+        # Only the workbook index is read, no sheet is parsed
+        with pd.ExcelFile(file_path, engine=EXCEL_ENGINE) as xlsx:
+            return xlsx.sheet_names
     except Exception as e:
         logger.error(f"Error getting sheet names: {str(e)}")
         return []